@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import geopandas as gpd
+from shapely.ops import (
+    Point,
+    LineString
+)
+
+from src.clic import red, green, orange, magenta
+from typing import Iterator
+
+from src.path_finder2 import _ShortestPathsWalk, all_paths_finder
+
+
+class AllPathsFinderThread:  # (QThread):
+    """Thread in charge of finding the paths between all FATs at once"""
+
+    def __init__(
+            self,
+            fats_gdf: gpd.GeoDataFrame,
+            fats_id_col: str,
+            path: list[LineString],
+            tolerance: float | int = 0.1
+    ) -> None:
+        self._fats_gdf = fats_gdf
+        self._fats_id_col = fats_id_col
+        self._path = path
+        self._tolerance = tolerance
+
+    def run(self) -> list[LineString]:
+        return self.find_paths()
+
+    def find_paths(self) -> list[LineString]:
+        print(f"\tfinding paths between {self._fats_gdf.index.size} FATs")
+        sources = list(self._fats_gdf['geometry'])
+
+        return all_paths_finder(
+            sources=sources,
+            path=self._path,
+            tolerance=self._tolerance
+        )
+
+    def find_paths_by_fat(self, fat_idxs: list[int] = None) -> Iterator[tuple[int, list[LineString] | None]]:
+        """
+        Yields a tuple (FAT index, paths found from that FAT) for every FAT in fat_idxs 
+        (all FATs if None). Paths found is None if the search from that FAT failed.
+        """
+
+        if fat_idxs is None:
+            fat_idxs = range(self._fats_gdf.index.size)
+
+        w = _ShortestPathsWalk(
+            sources=list(self._fats_gdf['geometry']),
+            path=self._path,
+            tolerance=self._tolerance
+        )
+        for i in fat_idxs:
+            print(f"\tfinding paths from {self._fats_gdf.loc[i, self._fats_id_col]} ( {i + 1} / {self._fats_gdf.index.size} )")
+            try:
+                yield i, w.walk_from(i)
+            except Exception:
+                yield i, None
@@ -12,3 +12,4 @@ VENVS_PATH = join(ROOT_PATH, 'venvs')
 
 # PARAMETERS
 LOGGER_CLIO = True  # logger cli output enabled
+LOGGER_LEVEL = 10  # lowest level logged by default (src.logger.DEBUG)
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import json
+import numpy as np
+import shapely
+from numbers import Number
+
+
+_MAGIC = b'FATGRAPH'
+_FORMAT_VERSION = 1
+_ALIGNMENT = 8  # bytes, every array starts aligned
+
+# stands for a zero weight in to_csr, below any real weight but still an edge for csgraph
+ZERO_WEIGHT = np.finfo(np.float64).tiny
+
+
+class _WKBGeometries:
+    """
+    Read only sequence of geometries stored as a WKB blob plus an offsets table 
+    (geometry i is blob[offsets[i]:offsets[i + 1]], empty for None). Geometries 
+    are decoded when accessed.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray) -> None:
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        if start == end:
+            return None
+        return shapely.from_wkb(self.blob[start:end].tobytes())
+
+    @staticmethod
+    def encode(geometries) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the (blob, offsets) arrays of a sequence of shapely geometries (or None)"""
+
+        geometries_array = np.empty(len(geometries), dtype=object)
+        geometries_array[:] = geometries
+        wkbs = [b'' if wkb is None else wkb for wkb in shapely.to_wkb(geometries_array)]
+        offsets = np.zeros(len(wkbs) + 1, dtype=np.int64)
+        np.cumsum([len(wkb) for wkb in wkbs], out=offsets[1:])
+        blob = np.frombuffer(b''.join(wkbs), dtype=np.uint8)
+
+        return blob, offsets
+
+
+class FATEdgeTable:
+    """
+    Columnar copy of the edges of a FATGraph. Every edge is stored in both directions, 
+    sorted by row FAT (CSR order):
+        - indptr: int32, the entries of the FAT at index i are indptr[i]:indptr[i + 1]
+        - rows, cols: int32, FAT indexes of the ends of every entry
+        - edge_ids: int32, id of the (undirected) edge of every entry
+        - weights: {numeric data key: float64 array, one value per entry}
+        - geometries: {other data key: object array, one value per edge id}
+          (a lazily decoded WKB sequence when loaded from a file)
+    """
+
+    def __init__(
+            self,
+            fats: list,
+            indptr: np.ndarray,
+            cols: np.ndarray,
+            edge_ids: np.ndarray,
+            weights: dict[str, np.ndarray],
+            geometries: dict[str, np.ndarray]
+    ) -> None:
+        self.fats = fats
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.cols = np.asarray(cols, dtype=np.int32)
+        self.rows = np.repeat(np.arange(len(fats), dtype=np.int32), np.diff(self.indptr))
+        self.edge_ids = np.asarray(edge_ids, dtype=np.int32)
+        self.weights = {key: np.asarray(values, dtype=np.float64) for key, values in weights.items()}
+        self.geometries = geometries
+
+    @classmethod
+    def from_fat_graph(cls, fat_graph) -> FATEdgeTable:
+        """Builds the table from the edges of a FATGraph"""
+
+        n = len(fat_graph.fats)
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        cols, edge_ids = [], []
+        edge_id_of = {}  # (lower index, higher index) -> edge id
+        edge_datas = []
+        entry_datas = []
+
+        for row in range(n):
+            for col, data in fat_graph._adjacency.neighbours(row):
+                key = (min(row, col), max(row, col))
+                if key not in edge_id_of:
+                    edge_id_of[key] = len(edge_datas)
+                    edge_datas.append(data)
+                cols.append(col)
+                edge_ids.append(edge_id_of[key])
+                entry_datas.append(data)
+            indptr[row + 1] = len(cols)
+
+        weights, geometries = {}, {}
+        keys = []
+        for data in edge_datas:
+            for key in data:
+                if key not in keys:
+                    keys.append(key)
+        for key in keys:
+            if all(isinstance(data.get(key), Number) for data in edge_datas):
+                weights[key] = np.array([data[key] for data in entry_datas], dtype=np.float64)
+            else:
+                geometries[key] = np.empty(len(edge_datas), dtype=object)
+                geometries[key][:] = [data.get(key) for data in edge_datas]
+
+        return cls(
+            fats=list(fat_graph.fats),
+            indptr=indptr,
+            cols=np.array(cols, dtype=np.int32),
+            edge_ids=np.array(edge_ids, dtype=np.int32),
+            weights=weights,
+            geometries=geometries
+        )
+
+    def get_edge_count(self) -> int:
+        """Returns the number of (undirected) edges"""
+
+        return int(self.edge_ids.max()) + 1 if len(self.edge_ids) else 0
+
+    def get_entry_data(self, entry: int) -> dict:
+        """Returns the data dict of an entry, as FATGraph stores it"""
+
+        data = {key: float(values[entry]) for key, values in self.weights.items()}
+        edge_id = self.edge_ids[entry]
+        for key, values in self.geometries.items():
+            data[key] = values[edge_id]
+
+        return data
+
+    def to_csr(self, key: str):
+        """
+        Returns the weights of key as a scipy.sparse.csr_matrix (len(fats) x len(fats)) 
+        sharing the table arrays (no copy), ready for scipy.sparse.csgraph routines
+
+        csgraph reads explicit zeros as missing edges, so zero weights are replaced by 
+        ZERO_WEIGHT (the weights are then copied, only when there are zeros)
+        """
+
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError as e:
+            raise ImportError("to_csr needs scipy installed") from e
+
+        if key not in self.weights:
+            raise ValueError(f"{key} is not a numeric data key, it must be one of {list(self.weights)}")
+
+        weights = self.weights[key]
+        if not weights.all():
+            weights = np.where(weights == 0, ZERO_WEIGHT, weights)
+
+        n = len(self.fats)
+        return csr_matrix((weights, self.cols, self.indptr), shape=(n, n), copy=False)
+
+    def save(self, file_path: str) -> None:
+        """
+        Writes the table to file_path in a binary format: a JSON header followed by 
+        raw arrays (FAT names, indptr, cols, edge_ids, weights) and, for every 
+        geometry key, a WKB blob with an offsets table. See load.
+        """
+
+        arrays = {}
+        if all(isinstance(fat, str) for fat in self.fats):
+            fats_type = 'str'
+            arrays['fat_names'], arrays['fat_offsets'] = self._encode_names(self.fats)
+        elif all(isinstance(fat, (int, np.integer)) for fat in self.fats):
+            fats_type = 'int'
+            arrays['fat_names'] = np.asarray(self.fats, dtype=np.int64)
+        else:
+            raise ValueError("only FATs named by str or int can be saved")
+
+        arrays['indptr'] = self.indptr
+        arrays['cols'] = self.cols
+        arrays['edge_ids'] = self.edge_ids
+        for key, values in self.weights.items():
+            arrays[f'weight:{key}'] = values
+        for key, values in self.geometries.items():
+            geometries = [values[i] for i in range(len(values))]
+            if not all(geometry is None or isinstance(geometry, shapely.Geometry) for geometry in geometries):
+                raise ValueError(f"the values of {key} must be numbers or shapely geometries to be saved")
+            arrays[f'wkb:{key}'], arrays[f'wkb_offsets:{key}'] = _WKBGeometries.encode(geometries)
+
+        header = {
+            'fats_type': fats_type,
+            'weights': list(self.weights),
+            'geometries': list(self.geometries),
+            'arrays': {}
+        }
+        offset = 0
+        for name, array in arrays.items():
+            header['arrays'][name] = {'dtype': array.dtype.str, 'count': int(array.size), 'offset': offset}
+            offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        header_bytes = json.dumps(header).encode('utf-8')
+        header_bytes += b' ' * (-(len(_MAGIC) + 8 + len(header_bytes)) % _ALIGNMENT)
+
+        with open(file_path, 'wb') as file:
+            file.write(_MAGIC)
+            file.write(np.array([_FORMAT_VERSION, len(header_bytes)], dtype='<u4').tobytes())
+            file.write(header_bytes)
+            for array in arrays.values():
+                data = np.ascontiguousarray(array).tobytes()
+                file.write(data)
+                file.write(b'\0' * (-len(data) % _ALIGNMENT))
+
+    @classmethod
+    def load(cls, file_path: str) -> FATEdgeTable:
+        """
+        Reads a table written by save. The file is memory-mapped: arrays are views 
+        of the file and geometries are decoded from WKB when accessed.
+        """
+
+        buffer = np.memmap(file_path, dtype=np.uint8, mode='r')
+        if buffer[:len(_MAGIC)].tobytes() != _MAGIC:
+            raise ValueError(f"{file_path} is not a FATGraph file")
+        version, header_length = np.frombuffer(buffer, dtype='<u4', count=2, offset=len(_MAGIC)).tolist()
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"{file_path} has format version {version}, expected {_FORMAT_VERSION}")
+
+        data_start = len(_MAGIC) + 8 + header_length
+        header = json.loads(buffer[len(_MAGIC) + 8:data_start].tobytes())
+
+        def array(name: str) -> np.ndarray:
+            info = header['arrays'][name]
+            return np.frombuffer(buffer, dtype=info['dtype'], count=info['count'], offset=data_start + info['offset'])
+
+        if header['fats_type'] == 'str':
+            fats = cls._decode_names(array('fat_names'), array('fat_offsets'))
+        else:
+            fats = array('fat_names').tolist()
+
+        return cls(
+            fats=fats,
+            indptr=array('indptr'),
+            cols=array('cols'),
+            edge_ids=array('edge_ids'),
+            weights={key: array(f'weight:{key}') for key in header['weights']},
+            geometries={key: _WKBGeometries(array(f'wkb:{key}'), array(f'wkb_offsets:{key}')) for key in header['geometries']}
+        )
+
+    @staticmethod
+    def _encode_names(names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        encoded = [name.encode('utf-8') for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+    @staticmethod
+    def _decode_names(blob: np.ndarray, offsets: np.ndarray) -> list[str]:
+        data = blob.tobytes()
+        offsets = offsets.tolist()
+
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def __str__(self) -> str:
+        return f"FATEdgeTable({len(self.fats)} FATs, {self.get_edge_count()} edges, " \
+               f"weights: {list(self.weights)}, geometries: {list(self.geometries)})"
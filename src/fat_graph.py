@@ -1,16 +1,231 @@
 from __future__ import annotations
 
-from src.logger import Logger
+import numpy as np
+from heapq import heappush, heappop, heapify
+from collections.abc import Mapping
+
+from src.logger import Logger, DEBUG, INFO
+from src.graph import Graph
+from src.fat_edge_table import FATEdgeTable
 from src.clic import green
 
 
+class _DenseAdjacency:
+    """
+    Adjacency matrix storage, holds len(fats)² slots plus the connected indexes of 
+    every row, so that neighbours costs the degree of the FAT and not len(fats)
+    """
+
+    def __init__(self, size: int) -> None:
+        self.adj_mat = [[None for _ in range(size)] for _ in range(size)]
+        self.neighbour_idxs = [set() for _ in range(size)]
+
+    def get(self, idx_1: int, idx_2: int) -> dict | None:
+        return self.adj_mat[idx_1][idx_2]
+
+    def set(self, idx_1: int, idx_2: int, data: dict) -> None:
+        self.adj_mat[idx_1][idx_2] = data
+        if data is None:
+            self.neighbour_idxs[idx_1].discard(idx_2)
+        else:
+            self.neighbour_idxs[idx_1].add(idx_2)
+
+    def neighbours(self, idx: int) -> list[tuple[int, dict]]:
+        """Returns (index, data) of the FATs connected to idx, sorted by index"""
+
+        row = self.adj_mat[idx]
+        return [(n_idx, row[n_idx]) for n_idx in sorted(self.neighbour_idxs[idx])]
+
+
+class _SparseAdjacency:
+    """Dict of dicts storage, only holds the existing edges"""
+
+    def __init__(self, size: int) -> None:
+        self.rows = [{} for _ in range(size)]
+
+    def get(self, idx_1: int, idx_2: int) -> dict | None:
+        return self.rows[idx_1].get(idx_2)
+
+    def set(self, idx_1: int, idx_2: int, data: dict) -> None:
+        self.rows[idx_1][idx_2] = data
+
+    def neighbours(self, idx: int) -> list[tuple[int, dict]]:
+        """Returns (index, data) of the FATs connected to idx, sorted by index"""
+
+        return sorted(self.rows[idx].items(), key=lambda item: item[0])
+
+
+class _EdgeData(Mapping):
+    """Data dict of an entry of a _TableAdjacency, its values are read from the table on access"""
+
+    __slots__ = ('adjacency', 'entry')
+
+    def __init__(self, adjacency: _TableAdjacency, entry: int) -> None:
+        self.adjacency = adjacency
+        self.entry = entry
+
+    def __getitem__(self, key: str):
+        weights = self.adjacency.get_weights(key)
+        if weights is not None:
+            return weights[self.entry]
+        geometries = self.adjacency.edge_table.geometries
+        if key in geometries:
+            return geometries[key][int(self.adjacency.edge_table.edge_ids[self.entry])]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self.adjacency.edge_table.weights
+        yield from self.adjacency.edge_table.geometries
+
+    def __len__(self) -> int:
+        return len(self.adjacency.edge_table.weights) + len(self.adjacency.edge_table.geometries)
+
+    def __reduce__(self):
+        return dict, (dict(self),)  # pickled as a plain dict, not as the whole table
+
+
+class _TableAdjacency:
+    """
+    Read only storage over a FATEdgeTable, used by the FATGraphs loaded from a file. 
+    The arrays used while grouping are copied to lists on their first access.
+    """
+
+    def __init__(self, edge_table: FATEdgeTable) -> None:
+        self.edge_table = edge_table
+        self._indptr = edge_table.indptr.tolist()
+        self._cols = None
+        self._weights = {}  # data key -> list of the weights of every entry
+        self._rows = {}  # FAT index -> its neighbours
+
+    def get_weights(self, key: str) -> list[float] | None:
+        """Returns the weights of key of every entry, None if key is not a numeric data key"""
+
+        if key not in self._weights:
+            if key not in self.edge_table.weights:
+                return None
+            self._weights[key] = self.edge_table.weights[key].tolist()
+        return self._weights[key]
+
+    def get(self, idx_1: int, idx_2: int) -> _EdgeData | None:
+        start, end = self._indptr[idx_1], self._indptr[idx_1 + 1]
+        entry = start + int(np.searchsorted(self.edge_table.cols[start:end], idx_2))  # cols are sorted by row
+        if entry < end and self.edge_table.cols[entry] == idx_2:
+            return _EdgeData(self, entry)
+        return None
+
+    def set(self, idx_1: int, idx_2: int, data: dict) -> None:
+        raise ValueError("FATGraphs loaded from a file are read only, load them with storage='sparse' to insert edges")
+
+    def neighbours(self, idx: int) -> list[tuple[int, _EdgeData]]:
+        """Returns (index, data) of the FATs connected to idx, sorted by index"""
+
+        if idx not in self._rows:
+            if self._cols is None:
+                self._cols = self.edge_table.cols.tolist()
+            start, end = self._indptr[idx], self._indptr[idx + 1]
+            self._rows[idx] = [(self._cols[entry], _EdgeData(self, entry)) for entry in range(start, end)]
+        return list(self._rows[idx])
+
+
+class _ResidualDegrees:
+    """
+    Degree and total weight of every FAT of a FATGraph counting only the edges to FATs 
+    not grouped yet, decremented as FATs get grouped. The most disconnected FAT is kept 
+    on top of a heap keyed (degree, -total weight, index).
+    """
+
+    def __init__(self, fat_graph: FATGraph, evaluate_data_key: str, ignore_fats: set) -> None:
+        """
+        :param ignore_fats: Set of the grouped FATs, shared with (and updated by) the caller
+        """
+
+        self._fat_graph = fat_graph
+        self._evaluate_data_key = evaluate_data_key
+        self._ignore_fats = ignore_fats
+
+        self._degrees = []  # residual degree of every FAT index
+        self._weights = []  # residual total weight of every FAT index
+        self._neighbour_sums = []  # sum of the indexes of the residual neighbours of every FAT index
+        self._removed = [False for _ in range(len(fat_graph.fats))]  # FAT indexes already removed
+        self._keys = []  # current heap key of every FAT index
+        for fat_idx in range(len(fat_graph.fats)):
+            d, tw, neighbour_sum = 0, 0, 0
+            for neighbour_idx, data in fat_graph._adjacency.neighbours(fat_idx):
+                if fat_graph.fats[neighbour_idx] not in ignore_fats:
+                    d += 1
+                    tw += data[evaluate_data_key]
+                    neighbour_sum += neighbour_idx
+            self._degrees.append(d)
+            self._weights.append(tw)
+            self._neighbour_sums.append(neighbour_sum)
+            self._keys.append((d, -tw, fat_idx))
+        self._heap = list(self._keys)
+        heapify(self._heap)
+
+    def _get_weight(self, fat_idx: int, removed_data: dict):
+        """
+        Returns the residual total weight of the FAT at fat_idx once the edge of removed_data 
+        is removed. Subtracting leaves rounding errors, so with one edge left its weight is 
+        read (FATs sharing their last edge must tie on it), and with none it is 0
+        """
+
+        if self._degrees[fat_idx] == 0:
+            return 0
+        if self._degrees[fat_idx] == 1:
+            data = self._fat_graph._adjacency.get(fat_idx, self._neighbour_sums[fat_idx])
+            return data[self._evaluate_data_key]
+        return self._weights[fat_idx] - removed_data[self._evaluate_data_key]
+
+    def remove(self, fats: list) -> None:
+        """
+        Decrements the degree and total weight of the FATs connected to the parameter fats, 
+        which must be already in ignore_fats. O(degree) per FAT
+        """
+
+        fat_graph = self._fat_graph
+        for fat in fats:
+            fat_idx = fat_graph._get_index_of_fat(fat)
+            if fat_idx == -1 or self._removed[fat_idx]:
+                continue
+            self._removed[fat_idx] = True
+            for neighbour_idx, data in fat_graph._adjacency.neighbours(fat_idx):
+                if fat_graph.fats[neighbour_idx] in self._ignore_fats:
+                    continue
+                self._degrees[neighbour_idx] -= 1
+                self._neighbour_sums[neighbour_idx] -= fat_idx
+                self._weights[neighbour_idx] = self._get_weight(neighbour_idx, data)
+                key = (self._degrees[neighbour_idx], -self._weights[neighbour_idx], neighbour_idx)
+                self._keys[neighbour_idx] = key
+                heappush(self._heap, key)  # the old key stays in the heap, it is skipped when popped
+
+    def get_most_disconnected_fat(self) -> str:
+        """Returns the FAT with the lowest degree (the highest total weight on ties), '' if all FATs are grouped"""
+
+        while self._heap:
+            key = self._heap[0]
+            fat_idx = key[2]
+            if key != self._keys[fat_idx] or self._fat_graph.fats[fat_idx] in self._ignore_fats:
+                heappop(self._heap)  # outdated key or grouped FAT
+                continue
+            return self._fat_graph.fats[fat_idx]
+
+        return ''
+
+
 class FATGraph:
     """"""
 
-    def __init__(self, fats: list, edges: list = None) -> None:
+    STORAGES = {
+        'dense': _DenseAdjacency,
+        'sparse': _SparseAdjacency
+    }
+
+    def __init__(self, fats: list, edges: list = None, storage: str = 'dense') -> None:
         """
         :param fats: List of FATs names (str)
         :param edges: List of 3-tuples, each one containing 0: name of nap, 1: name of nap, 2: dict with data
+        :param storage: 'dense' keeps a len(fats)² adjacency matrix, 
+            'sparse' only keeps the existing edges (memory scales with edges)
 
         Example:
         fats <- ['f1', 'f2', 'f3']
@@ -34,8 +249,13 @@ class FATGraph:
         ]
         """
 
+        if storage not in self.STORAGES:
+            raise ValueError(f"Unknown storage {storage}, it must be one of {list(self.STORAGES)}")
+
         self.fats = fats
-        self.adj_mat = [[None for _ in fats] for _ in fats]
+        self.storage = storage
+        self._adjacency = self.STORAGES[storage](len(fats))
+        self._fat_index = self._index_fats(fats)
 
         if edges is not None:
             for edge in edges:
@@ -43,6 +263,16 @@ class FATGraph:
 
         self.l = Logger(log_type='cli')
 
+    @staticmethod
+    def _index_fats(fats: list) -> dict:
+        """Returns name -> index of its first appearance in fats"""
+
+        fat_index = {}
+        for f_idx, f in enumerate(fats):
+            fat_index.setdefault(f, f_idx)
+
+        return fat_index
+
     def insert_edge(self, edge: tuple) -> None:
         """
         Inserts an edge in the FAT graph
@@ -70,15 +300,41 @@ class FATGraph:
         idx_1 = self._get_index_of_fat(fat_1)
         idx_2 = self._get_index_of_fat(fat_2)
 
-        self.adj_mat[idx_1][idx_2] = data
-        self.adj_mat[idx_2][idx_1] = data
+        self._adjacency.set(idx_1, idx_2, data)
+        self._adjacency.set(idx_2, idx_1, data)
+
+    def insert_edges(self, idxs_1: list[int], idxs_2: list[int], datas: list[dict]) -> None:
+        """
+        Inserts many edges at once, with the FATs already resolved to their indexes 
+        (see get_indexes_of_fats)
+
+        :param idxs_1: Index of the first FAT of every edge
+        :param idxs_2: Index of the second FAT of every edge
+        :param datas: Dict with the data of every edge
+        """
+
+        if not len(idxs_1) == len(idxs_2) == len(datas):
+            raise ValueError("Can't insert edges because idxs_1, idxs_2 and datas lengths don't match")
+
+        n = len(self.fats)
+        for idx_1, idx_2, data in zip(idxs_1, idxs_2, datas):
+            if not (0 <= idx_1 < n and 0 <= idx_2 < n):
+                raise ValueError(f"Can't insert edge because ({idx_1}, {idx_2}) is out of the graph")
+
+            self._adjacency.set(idx_1, idx_2, data)
+            self._adjacency.set(idx_2, idx_1, data)
 
     def has_fat(self, fat: str) -> bool:
         """
         :return: True if fat in FATGraph, False otherwise
         """
 
-        return fat in self.fats
+        return fat in self._fat_index
+
+    def get_indexes_of_fats(self, fats: list) -> list[int]:
+        """Returns the index of every FAT, -1 for the FATs not in the graph"""
+
+        return [self._fat_index.get(fat, -1) for fat in fats]
 
     def get_edge_data(self, fat1: str, fat2: str) -> dict | None:
         """Resturs the data of an edge if it exists, else return None"""
@@ -88,7 +344,7 @@ class FATGraph:
         if not self.has_fat(fat2):
             raise Exception(f"Can't get edge data because {fat2} is not in the graph")
 
-        return self.adj_mat[self._get_index_of_fat(fat1)][self._get_index_of_fat(fat2)]
+        return self._adjacency.get(self._get_index_of_fat(fat1), self._get_index_of_fat(fat2))
 
     def _get_index_of_fat(self, fat: str) -> int:
         """
@@ -97,12 +353,27 @@ class FATGraph:
         :return: index (int) of parameter fat inside self.fats list
         """
 
-        for f_idx, f in enumerate(self.fats):
-            if f == fat:
-                return f_idx
-        return -1
+        return self._fat_index.get(fat, -1)
+
+    def _get_residual_degree(self, fat_idx: int, evaluate_data_key: str, ignore_fats: set | list = ()) -> tuple[int, float]:
+        """
+        :return: Tuple containing 0: degree, 1: total weight of the FAT at fat_idx, 
+            only counting the edges to FATs not in ignore_fats
+        """
+
+        d = 0  # degree count
+        tw = 0  # total weight sum
+
+        for fat_col_idx, data in self._adjacency.neighbours(fat_idx):
+            if self.fats[fat_col_idx] in ignore_fats:  # ignore this column
+                continue
+
+            d += 1
+            tw += data[evaluate_data_key]
+
+        return d, tw
 
-    def _get_most_disconnected_fat(self, evaluate_data_key: str, ignore_fats: list = []) -> str:
+    def _get_most_disconnected_fat(self, evaluate_data_key: str, ignore_fats: set | list = ()) -> str:
         """
         Evaluates which FAT is the most disconnected from the rest 
         (ignoring specified FATs), and returns it
@@ -114,75 +385,78 @@ class FATGraph:
             if fat_row in ignore_fats:
                 continue
             
-            d = 0  # fat_row degree count
-            tw = 0  # fat_row total weight sum
-
-            for fat_col_idx, fat_col in enumerate(self.fats):
-                if fat_col in ignore_fats:  # ignore this column
-                    continue
-
-                data = self.adj_mat[fat_row_idx][fat_col_idx]
-                if data is None:  # there's no edge
-                    continue
-
-                d += 1
-                tw += data[evaluate_data_key]
+            d, tw = self._get_residual_degree(fat_row_idx, evaluate_data_key, ignore_fats)
 
             if (d < fat_degree) or (d == fat_degree and tw > total_weight):
                 fat, fat_degree, total_weight = fat_row, d, tw
 
         return fat
 
-    def _create_group(self, n: int, evaluate_data_key: str, retrieve_data_key: str, ignore_fats: list = [], starting_from: str = None) -> dict:
+    def _create_group(self, n: int, evaluate_data_key: str, retrieve_data_key: str, ignore_fats: set | list = (), starting_from: str = None) -> dict:
         """
         Constructs a group of n FATs using evaluate_data_key to minimize weights, 
-        and retrieve_data_key to get the edge information.
+        and retrieve_data_key to get the edge information. 
+        The group grows Prim-like, from a priority queue of the edges leaving it.
 
         :return: Dict looking like this -> {
             'fats_in_group': ['f1', 'f2', 'f3', ...]
             'edges_in_group': [<edge_retrieved_data>, <edge_retrieved_data>, ...]
+            'weight_in_group': <sum of the evaluate_data_key of the edges>
         }
         """
         if starting_from is None:
             fats_in_group = [self._get_most_disconnected_fat(evaluate_data_key, ignore_fats)]
         else:
             fats_in_group = [starting_from]
+        in_group = set(fats_in_group)
         edges = []
-        
-        while len(fats_in_group) < n:
-            self._log(f"Group in progress {fats_in_group}")
-            edge_row, edge_col, weight = 0, 0, 0
-            for fat_row in fats_in_group:
-                fat_row_idx = self._get_index_of_fat(fat_row)
 
+        # frontier of edges leaving the group, as (weight, position of the row FAT in the group, 
+        # column index, row index) so ties go to the earliest FAT in the group, then the lowest column
+        frontier = []
 
-                for fat_col_idx, fat_col in enumerate(self.fats):
+        def push_edges_of(fat_row: str, row_position: int) -> None:
+            fat_row_idx = self._get_index_of_fat(fat_row)
+            for fat_col_idx, data in self._adjacency.neighbours(fat_row_idx):
+                fat_col = self.fats[fat_col_idx]
+                if fat_col not in ignore_fats and fat_col not in in_group:
+                    heappush(frontier, (data[evaluate_data_key], row_position, fat_col_idx, fat_row_idx))
 
-                    if fat_col in ignore_fats + fats_in_group:  # ignore this column
-                        continue
+        push_edges_of(fats_in_group[0], 0)
 
-                    data = self.adj_mat[fat_row_idx][fat_col_idx]
-                    if data is None:  # there's no edge
-                        continue
-
-                    if weight == 0 or data[evaluate_data_key] < weight:
-                        edge_row, edge_col, weight = fat_row_idx, fat_col_idx, data[evaluate_data_key]
+        debug = self.l.level <= DEBUG
+        while len(fats_in_group) < n:
+            if debug:
+                self._log("Group in progress %s", fats_in_group)
+
+            edge_col = None
+            while frontier:
+                _, _, fat_col_idx, fat_row_idx = heappop(frontier)
+                if self.fats[fat_col_idx] not in in_group:  # else the column joined the group after the push
+                    edge_row, edge_col = fat_row_idx, fat_col_idx
+                    break
 
-            if weight != 0:
-                fats_in_group.append(self.fats[edge_col])
-                edges.append((edge_row, edge_col))
-                self._log(f"{self.fats[edge_col]}, edge {(edge_row, edge_col)} added to group")
-            else:  # can't find more fats
+            if edge_col is None:  # can't find more fats
                 break
 
+            fats_in_group.append(self.fats[edge_col])
+            in_group.add(self.fats[edge_col])
+            edges.append((edge_row, edge_col))
+            if debug:
+                self._log("%s, edge %s added to group", self.fats[edge_col], (edge_row, edge_col))
+            push_edges_of(self.fats[edge_col], len(fats_in_group) - 1)
+
         edges_in_group = []
+        weight_in_group = 0
         for edge_row, edge_col in edges:
-            data = self.adj_mat[edge_row][edge_col]
+            data = self._adjacency.get(edge_row, edge_col)
             edges_in_group.append(data[retrieve_data_key])
+            weight_in_group += data[evaluate_data_key]
 
         return {
             'fats_in_group': fats_in_group,
-            'edges_in_group': edges_in_group
+            'edges_in_group': edges_in_group,
+            'weight_in_group': weight_in_group
         }
 
     def group_by_n(self, n: int, evaluate_data_key: str, retrieve_data_key: str, starting_from: str = None) -> list:
@@ -194,49 +468,242 @@ class FATGraph:
             {
                 'fats_in_group': ['f1', 'f2', 'f3', ...]
                 'edges_in_group': [<edge_retrieved_data>, <edge_retrieved_data>, ...]
+                'weight_in_group': <sum of the evaluate_data_key of the edges>
             },
             {
                 'fats_in_group': ['f4', 'f5', 'f6', ...]
                 'edges_in_group': [<edge_retrieved_data>, <edge_retrieved_data>, ...]
+                'weight_in_group': <sum of the evaluate_data_key of the edges>
             },
             ...
         ]
         """
 
-        ignore_fats = []
+        ignore_fats = set()
+        grouped_count = 0  # FATs of the graph inside ignore_fats
         groups = []
 
-        all_grouped = False
+        all_grouped = len(self._fat_index) == 0
+        residual_degrees = _ResidualDegrees(self, evaluate_data_key, ignore_fats)
         while not all_grouped:
+            if starting_from is None:
+                starting_from = residual_degrees.get_most_disconnected_fat()
             group = self._create_group(n, evaluate_data_key, retrieve_data_key, ignore_fats, starting_from)
             starting_from = None
             groups.append(group)
-            self._log(green('New group created'))
-            self._log(green(f"\tFATs:  {group['fats_in_group']}"))
-            self._log(green(f"\tedges: {group['edges_in_group']}"))
-
-            ignore_fats += group['fats_in_group']
-            all_grouped = True
-            for fat in self.fats:
-                if fat not in ignore_fats:
-                    all_grouped = False
-                    break
+            if self.l.level <= DEBUG:
+                self._log(green('New group created'))
+                self._log(green("\tFATs:  %s"), group['fats_in_group'])
+                self._log(green("\tedges: %s"), group['edges_in_group'])
+
+            for fat in group['fats_in_group']:
+                if fat in self._fat_index and fat not in ignore_fats:
+                    grouped_count += 1
+                ignore_fats.add(fat)
+            all_grouped = grouped_count == len(self._fat_index)
+            residual_degrees.remove(group['fats_in_group'])
 
         return groups
 
-    def _log(self, log: str) -> None:
-        """Handles the log"""
+    @staticmethod
+    def _get_settle_order(graph: Graph, start_idx: int, part: list[int]) -> list[int]:
+        """
+        Runs Dijkstra (Graph.dijkstra) from start_idx over the FATs in part, 
+        returns the FAT indexes in the order they are settled (closest first)
+        """
+
+        distances, _ = graph.dijkstra(start_idx, within=part)
+        return list(distances)  # in settle order
+
+    def _create_tree_group(self, part: list[int], weighted_neighbours: list, 
+                           evaluate_data_key: str, retrieve_data_key: str) -> dict:
+        """
+        Constructs the group of the FATs in part (a connected set of FAT indexes) 
+        joined by their minimum spanning tree (Graph.minimumSpanningTree). Same output as _create_group.
+        """
+
+        part_graph = Graph()
+        for fat_idx in part:
+            part_graph.addNode(fat_idx)
+        for fat_idx in part:
+            for neighbour_idx, weight in weighted_neighbours[fat_idx]:
+                if neighbour_idx > fat_idx and part_graph.hasNode(neighbour_idx):
+                    part_graph.addEdge(fat_idx, neighbour_idx, weight)
+
+        edges_in_group = []
+        weight_in_group = 0
+        for edge in part_graph.minimumSpanningTree():
+            edge_row, edge_col = edge.endpoint0.value, edge.endpoint1.value
+            data = self._adjacency.get(edge_row, edge_col)
+            edges_in_group.append(data[retrieve_data_key])
+            weight_in_group += data[evaluate_data_key]
+
+        return {
+            'fats_in_group': [self.fats[fat_idx] for fat_idx in part],
+            'edges_in_group': edges_in_group,
+            'weight_in_group': weight_in_group
+        }
+
+    def group_by_bisection(self, n: int, evaluate_data_key: str, retrieve_data_key: str) -> list:
+        """
+        Constructs groups of n FATs (max) by recursive graph bisection: every connected 
+        part bigger than n is split in the FATs closest to a peripheral FAT (a multiple 
+        of n of them) and the rest, until parts fit in a group. Each group is joined by 
+        its minimum spanning tree over evaluate_data_key. Each level of the recursion 
+        is one Dijkstra over the graph, but groups may be emptier than the group_by_n ones.
+
+        :return: Same as group_by_n
+        """
+
+        weighted_neighbours = [
+            [(neighbour_idx, data[evaluate_data_key]) for neighbour_idx, data in self._adjacency.neighbours(fat_idx)]
+            for fat_idx in range(len(self.fats))
+        ]
+
+        graph = self._get_index_graph(weighted_neighbours)
+
+        groups = []
+        parts = [(component, None) for component in reversed(graph.connectedComponents())]  # (part, peripheral FAT)
+        while parts:
+            part, peripheral_idx = parts.pop()
+            if len(part) <= n:
+                groups.append(self._create_tree_group(part, weighted_neighbours, evaluate_data_key, retrieve_data_key))
+                continue
+
+            if peripheral_idx is None:
+                peripheral_idx = self._get_settle_order(graph, part[0], part)[-1]
+            order = self._get_settle_order(graph, peripheral_idx, part)
+
+            n_groups = -(-len(part) // n)  # ceil
+            k = n * max(1, n_groups // 2)
+
+            # the near side is connected (Dijkstra prefix) and keeps its peripheral FAT, 
+            # the far side may not be connected, the FATs settled last are peripheral
+            position = {fat_idx: i for i, fat_idx in enumerate(order)}
+            sub_parts = [(sorted(order[:k]), peripheral_idx)]
+            for far_part in graph.connectedComponents(within=sorted(order[k:])):
+                sub_parts.append((far_part, max(far_part, key=position.__getitem__)))
+            parts += reversed(sub_parts)
+
+        self._log(green("%s groups created by bisection"), len(groups), level=INFO)
+
+        return groups
+
+    def _get_index_graph(self, weighted_neighbours: list = None) -> Graph:
+        """
+        Returns a Graph whose Node values are the FAT indexes, in order, with an edge per 
+        edge of this graph, weighted as in weighted_neighbours (1 if not given)
+        """
+
+        graph = Graph()
+        graph.add_nodes_from(range(len(self.fats)))
+        if weighted_neighbours is None:
+            edges = [
+                (fat_idx, neighbour_idx)
+                for fat_idx in range(len(self.fats))
+                for neighbour_idx, _ in self._adjacency.neighbours(fat_idx)
+                if neighbour_idx > fat_idx
+            ]
+        else:
+            edges = [
+                (fat_idx, neighbour_idx, weight)
+                for fat_idx in range(len(self.fats))
+                for neighbour_idx, weight in weighted_neighbours[fat_idx]
+                if neighbour_idx > fat_idx
+            ]
+        graph.add_edges_from(edges)
+
+        return graph
+
+    def get_connected_components(self) -> list[list[int]]:
+        """
+        Finds the connected components with Graph.connectedComponents (union-find over the edges).
+
+        :return: List of components, each one a sorted list of FAT indexes. 
+            Components are sorted by their lowest FAT index
+        """
+
+        return self._get_index_graph().connectedComponents()
+
+    def get_subgraph(self, fat_idxs: list[int], storage: str = 'sparse') -> FATGraph:
+        """Returns a new FATGraph with the FATs at fat_idxs (in that order) and the edges between them"""
+
+        subgraph = FATGraph(fats=[self.fats[fat_idx] for fat_idx in fat_idxs], storage=storage)
+        sub_idx_of = {fat_idx: sub_idx for sub_idx, fat_idx in enumerate(fat_idxs)}
+
+        idxs_1, idxs_2, datas = [], [], []
+        for fat_idx in fat_idxs:
+            for neighbour_idx, data in self._adjacency.neighbours(fat_idx):
+                if neighbour_idx >= fat_idx and neighbour_idx in sub_idx_of:
+                    idxs_1.append(sub_idx_of[fat_idx])
+                    idxs_2.append(sub_idx_of[neighbour_idx])
+                    datas.append(data)
+        subgraph.insert_edges(idxs_1, idxs_2, datas)
+
+        return subgraph
+
+    def to_edge_table(self) -> FATEdgeTable:
+        """Returns a columnar copy of the edges (see FATEdgeTable), which exports to scipy.sparse"""
+
+        if isinstance(self._adjacency, _TableAdjacency):
+            return self._adjacency.edge_table
+        return FATEdgeTable.from_fat_graph(self)
+
+    def save(self, file_path: str) -> None:
+        """Writes the graph to file_path in the FATEdgeTable binary format, see FATGraph.load"""
+
+        self.to_edge_table().save(file_path)
+
+    @classmethod
+    def load(cls, file_path: str, storage: str = None) -> FATGraph:
+        """
+        Reads a graph written by FATGraph.save
+
+        :param storage: None keeps the graph read only over the memory-mapped file 
+            (opens without reading the edges, geometries are decoded when accessed), 
+            'dense' or 'sparse' copy the edges into that storage
+        """
+
+        edge_table = FATEdgeTable.load(file_path)
+        if storage is not None:
+            return cls.from_edge_table(edge_table, storage=storage)
+
+        fat_graph = cls(fats=[], storage='sparse')
+        fat_graph.fats = edge_table.fats
+        fat_graph.storage = 'file'
+        fat_graph._adjacency = _TableAdjacency(edge_table)
+        fat_graph._fat_index = cls._index_fats(edge_table.fats)
+
+        return fat_graph
+
+    @classmethod
+    def from_edge_table(cls, edge_table: FATEdgeTable, storage: str = 'sparse') -> FATGraph:
+        """Builds a FATGraph with the FATs and edges of a FATEdgeTable"""
+
+        fat_graph = cls(fats=list(edge_table.fats), storage=storage)
+
+        entries = np.flatnonzero(edge_table.rows <= edge_table.cols)  # one entry per edge
+        fat_graph.insert_edges(
+            idxs_1=edge_table.rows[entries].tolist(),
+            idxs_2=edge_table.cols[entries].tolist(),
+            datas=[edge_table.get_entry_data(entry) for entry in entries]
+        )
+
+        return fat_graph
+
+    def _log(self, log, *args, level: int = DEBUG) -> None:
+        """Handles the log, see Logger.log"""
         
-        self.l.log(log)
+        self.l.log(log, *args, level=level)
 
     def __str__(self) -> str:
         text = 'FATGraph\nFATs\n'
         text += f'\t{self.fats}\n'
         text += f'edges\n'
         for f1_idx, f1 in enumerate(self.fats):
-            for f2_idx, f2 in enumerate(self.fats):
-                data = self.adj_mat[f1_idx][f2_idx]
-                if f1_idx <= f2_idx and data is not None:
+            for f2_idx, data in self._adjacency.neighbours(f1_idx):
+                f2 = self.fats[f2_idx]
+                if f1_idx <= f2_idx:
                     text += f'\t< {f1} >---{data}---< {f2} >\n'
 
         return text
\ No newline at end of file
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import numpy as np
 import geopandas as gpd
 from shapely.ops import (
     Point,
@@ -9,7 +10,7 @@ from shapely.ops import (
     GeometryCollection,
     nearest_points
 )
-from shapely import unary_union
+from shapely import unary_union, STRtree, get_point, distance
 
 from os.path import join
 
@@ -26,107 +27,73 @@ class FATGraphConstructorThread:
             fats_gdf: gpd.GeoDataFrame, 
             fats_id_column: str, 
             all_paths_gdf: gpd.GeoDataFrame,
-            tolerance: float | int
+            tolerance: float | int,
+            storage: str = 'dense'
     ) -> None:
+        """
+        :param storage: Storage of the FATGraph adjacency, 'dense' or 'sparse'
+        """
+
         self.fats_gdf = fats_gdf
         self.fats_id_column = fats_id_column
         self.all_paths_gdf = all_paths_gdf
 
         self.tolerance = tolerance
 
-        self.fat_graph = FATGraph(fats=list(self.fats_gdf[self.fats_id_column]))
+        self.fat_graph = FATGraph(fats=list(self.fats_gdf[self.fats_id_column]), storage=storage)
 
     def run(self) -> FATGraph:
         return self.create_fat_graph()
 
-    def _matches_line_end(
-        self, 
-        ends: tuple[int], 
-        path: LineString, 
-        fat1: str, 
-        fat1_geom: Point, 
-        i: int
-    ):
-        if Point(path.coords[ends[0]]).distance(fat1_geom) < self.tolerance:
-            for j in range(self.fats_gdf.index.size): 
-                if j != i:
-                    fat2 = self.fats_gdf.loc[j, self.fats_id_column]
-                    fat2_geom: Point = self.fats_gdf.loc[j, 'geometry']
-                    if Point(path.coords[ends[1]]).distance(fat2_geom) < self.tolerance:
-                        data = self.fat_graph.get_edge_data(fat1, fat2)
-                        if data is None or data['weight'] > path.length:
-                            self.fat_graph.insert_edge(
-                                (
-                                    fat1,
-                                    fat2,
-                                    {
-                                        'weight': path.length,
-                                        'linestring': path
-                                    }
-                                )
-                            )
+    def _match_fats(self, points: np.ndarray, fats_tree: STRtree, fat_geoms: np.ndarray) -> dict[int, list[int]]:
+        """
+        Finds the FATs closer than tolerance to each point with a single STRtree query.
+
+        :return: Dict looking like this -> {point index: [FAT index, FAT index, ...]}
+        """
+
+        point_idxs, fat_idxs = fats_tree.query(points, predicate='dwithin', distance=self.tolerance)
+        close = distance(points[point_idxs], fat_geoms[fat_idxs]) < self.tolerance
+
+        matches = {}
+        for point_idx, fat_idx in zip(point_idxs[close].tolist(), fat_idxs[close].tolist()):
+            matches.setdefault(point_idx, []).append(fat_idx)
+        for fat_list in matches.values():
+            fat_list.sort()
+
+        return matches
 
     def create_fat_graph(self) -> FATGraph:
         all_paths = list(self.all_paths_gdf.geometry)
+        if not all_paths:
+            return self.fat_graph
 
-        # insert edges
-        for path in all_paths:
+        fats = list(self.fats_gdf[self.fats_id_column])
+        fat_geoms = np.asarray(self.fats_gdf.geometry.values, dtype=object)
+        fats_tree = STRtree(fat_geoms)
+
+        # FATs at each end of every path
+        start_fats = self._match_fats(get_point(all_paths, 0), fats_tree, fat_geoms)
+        end_fats = self._match_fats(get_point(all_paths, -1), fats_tree, fat_geoms)
+
+        # keep the shortest path between every pair of FATs
+        graph_idxs = self.fat_graph.get_indexes_of_fats(fats)
+        shortest = {}  # (graph index, graph index) -> (length, path)
+        for path_idx, path in enumerate(all_paths):
             path: LineString
-            for i in range(self.fats_gdf.index.size):
-                fat1 = self.fats_gdf.loc[i, self.fats_id_column]
-                fat1_geom: Point = self.fats_gdf.loc[i, 'geometry']
-
-                self._matches_line_end(
-                    ends=(0, -1),
-                    path=path,
-                    fat1=fat1,
-                    fat1_geom=fat1_geom,
-                    i=i
-                )
-                # if Point(path.coords[0]).distance(fat1_geom) < self.tolerance:
-                #     for j in range(self.fats_gdf.index.size): 
-                #         if j != i:
-                #             fat2 = self.fats_gdf.loc[j, self.fats_id_column]
-                #             fat2_geom: Point = self.fats_gdf.loc[j, 'geometry']
-                #             if Point(path.coords[-1]).distance(fat2_geom) < self.tolerance:
-                #                 data = self.fat_graph.get_edge_data(fat1, fat2)
-                #                 if data is None or data['weight'] > path.length:
-                #                     self.fat_graph.insert_edge(
-                #                         (
-                #                             fat1,
-                #                             fat2,
-                #                             {
-                #                                 'weight': path.length,
-                #                                 'linestring': path
-                #                             }
-                #                         )
-                #                     )
-
-                self._matches_line_end(
-                    ends=(-1, 0),
-                    path=path,
-                    fat1=fat1,
-                    fat1_geom=fat1_geom,
-                    i=i
-                )
-                # if Point(path.coords[-1]).distance(fat1_geom) < self.tolerance:
-                #     for j in range(self.fats_gdf.index.size): 
-                #         if j != i:
-                #             fat2 = self.fats_gdf.loc[j, self.fats_id_column]
-                #             fat2_geom: Point = self.fats_gdf.loc[j, 'geometry']
-                #             if Point(path.coords[0]).distance(fat2_geom) < self.tolerance:
-                #                 data = self.fat_graph.get_edge_data(fat1, fat2)
-                #                 if data is None or data['weight'] > path.length:
-                #                     self.fat_graph.insert_edge(
-                #                         (
-                #                             fat1,
-                #                             fat2,
-                #                             {
-                #                                 'weight': path.length,
-                #                                 'linestring': path
-                #                             }
-                #                         )
-                #                     )
+            length = path.length
+            for i in start_fats.get(path_idx, []):
+                for j in end_fats.get(path_idx, []):
+                    if j != i:
+                        key = (min(graph_idxs[i], graph_idxs[j]), max(graph_idxs[i], graph_idxs[j]))
+                        if key not in shortest or shortest[key][0] > length:
+                            shortest[key] = (length, path)
+
+        # insert edges
+        self.fat_graph.insert_edges(
+            idxs_1=[idx_1 for idx_1, _ in shortest],
+            idxs_2=[idx_2 for _, idx_2 in shortest],
+            datas=[{'weight': length, 'linestring': path} for length, path in shortest.values()]
+        )
 
         return self.fat_graph
-                    
@@ -11,6 +11,8 @@ from shapely.ops import (
 )
 from shapely import unary_union
 
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
 from os.path import join
 
 from src.clic import red, green, orange, magenta
@@ -18,23 +20,95 @@ from src.fat_graph import FATGraph
 from src.path_finder2 import path_finder
 
 
+# strategy -> FATGraph grouping method
+_STRATEGY_METHODS = {
+    'greedy': 'group_by_n',
+    'bisection': 'group_by_bisection'
+}
+
+
+def _group_component(args: tuple) -> list[dict]:
+    """Groups the FATGraph of a connected component inside a worker"""
+
+    component_graph, n, strategy, evaluate_data_key, retrieve_data_key = args
+    return getattr(component_graph, _STRATEGY_METHODS[strategy])(
+        n=n,
+        evaluate_data_key=evaluate_data_key,
+        retrieve_data_key=retrieve_data_key
+    )
+
+
 class FATGraphGrouperThread:  # (QThread):
     """Thread in charge of grouping all FATs"""
 
     def __init__(
             self,
             fat_graph: FATGraph,
-            n: int
+            n: int,
+            workers: int = 1,
+            strategy: str = 'greedy'
     ) -> None:
+        """
+        :param workers: Number of processes the connected components are grouped in, 
+            1 groups the whole graph in this process, None uses all the CPUs
+        :param strategy: 'greedy' grows groups from the most disconnected FAT (FATGraph.group_by_n), 
+            'bisection' recursively bisects the graph (FATGraph.group_by_bisection), 
+            faster on big graphs
+        """
+
+        if strategy not in _STRATEGY_METHODS:
+            raise ValueError(f"strategy must be one of {list(_STRATEGY_METHODS)}, got '{strategy}'")
+
         self._fat_graph = fat_graph
         self._n = n
+        self._workers = workers
+        self._strategy = strategy
+        self._total_weight = None
 
     def run(self) -> list[dict]:
-        return self.group_by_n()
+        if self._workers == 1:
+            groups = self.group()
+        else:
+            groups = self.group_components()
+
+        self._total_weight = sum(group['weight_in_group'] for group in groups)
+        print(f"\t{len(groups)} groups ({self._strategy}), total weight: {self._total_weight}")
+
+        return groups
+
+    def get_total_weight(self) -> float:
+        """Sum of the weights of the edges inside the groups of the last run, None before running"""
+        return self._total_weight
+
+    def group(self) -> list[dict]:
+        """Groups the whole graph in this process with the configured strategy"""
+        return _group_component((self._fat_graph, self._n, self._strategy, 'weight', 'linestring'))
 
     def group_by_n(self) -> list[dict]:
-        return self._fat_graph.group_by_n(
-            n=self._n,
-            evaluate_data_key='weight',
-            retrieve_data_key='linestring'
-        )
\ No newline at end of file
+        """Groups the whole graph in this process with the greedy strategy, whatever the configured one"""
+        return _group_component((self._fat_graph, self._n, 'greedy', 'weight', 'linestring'))
+
+    def group_components(self) -> list[dict]:
+        """
+        Groups every connected component independently in a process pool 
+        (groups never cross components). Groups are merged in the order of 
+        the components (sorted by their lowest FAT index).
+        """
+
+        components = self._fat_graph.get_connected_components()
+        print(f"\tgrouping {len(components)} connected components")
+
+        tasks = [
+            (self._fat_graph.get_subgraph(component), self._n, self._strategy, 'weight', 'linestring') 
+            for component in components
+        ]
+
+        workers = self._workers if self._workers is not None else cpu_count()
+        chunksize = max(1, len(tasks) // (4 * workers))  # many components are single FATs
+
+        groups = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for component_groups in executor.map(_group_component, tasks, chunksize=chunksize):
+                groups += component_groups
+
+        return groups
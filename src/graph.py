@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import numpy as np
+from heapq import heappush, heappop
+
 
 class _Node:
     """Node inside the graph. Holds a value."""
 
+    __slots__ = ('value',)
+
     def __init__(self, value) -> None:
         self.value = value
 
@@ -25,106 +30,369 @@ class _Node:
 
 
 class _Edge:
-    """Representation of a weighted Edge that connects two Nodes."""
+    """
+    Representation of a weighted Edge that connects two Nodes.
+
+    The Edges handed out by a Graph are views of its Edge columns: reading them reads
+    the columns, and setting their weight or endpoints writes the columns, so the Graph
+    algorithms see the change. An Edge built on its own keeps its own values.
+    """
+
+    __slots__ = ('_endpoints', '_weight', '_graph', '_edge_id')
+
+    def __init__(self, endpoint0: _Node, endpoint1: _Node, weight: int | float = 1,
+                 graph: Graph = None, edge_id: int = -1) -> None:
+        """
+        :param graph: Graph whose Edge columns the Edge is a view of, None for a standalone Edge
+        :param edge_id: Row of the Edge in the columns of `graph`
+        """
+
+        self._graph = graph
+        self._edge_id = edge_id
+        self._endpoints = [endpoint0, endpoint1]
+        self._weight = weight
+
+    @property
+    def endpoint0(self) -> _Node:
+        return self.getEndpoint(0)
+
+    @endpoint0.setter
+    def endpoint0(self, node: _Node) -> None:
+        self.setEndpoint(node, 0)
+
+    @property
+    def endpoint1(self) -> _Node:
+        return self.getEndpoint(1)
+
+    @endpoint1.setter
+    def endpoint1(self, node: _Node) -> None:
+        self.setEndpoint(node, 1)
 
-    def __init__(self, endpoint0: _Node, endpoint1: _Node, weight: int | float = 1 ) -> None:
-        self.endpoints = [endpoint0, endpoint1]
-        self.weight = weight
+    @property
+    def weight(self) -> float:
+        if self._graph is None:
+            return self._weight
+        return float(self._graph._weights[self._edge_id])
+
+    @weight.setter
+    def weight(self, weight: int | float) -> None:
+        if self._graph is None:
+            self._weight = weight
+        else:
+            self._graph._set_edge_weight(self._edge_id, weight)
 
     def setEndpoint(self, node: _Node, position: int) -> None:
         """
         Sets one endpoint of the Edge. `position` (0 or 1) defines the end of the Edge to
-        which the `node` is connected.
+        which the `node` is connected. The `node` of an Edge of a Graph must be in that Graph.
         """
 
-        if position < 0 or position > 1:
+        if position not in (0, 1):
             raise Exception(f"Invalid position {position}, it must be 0 or 1.")
 
-        self.endpoints[position] = node
+        if self._graph is None:
+            self._endpoints[position] = node
+        else:
+            self._graph._set_edge_endpoint(self._edge_id, node.getValue(), position)
 
     def getEndpoint(self, position: int) -> _Node:
         """Returns the Node connected to the edge at the specified `position` (0 or 1)."""
 
-        if position < 0 or position > 1:
+        if position not in (0, 1):
             raise Exception(f"Invalid position {position}, it must be 0 or 1.")
 
-        return self.endpoints[position]
+        if self._graph is None:
+            return self._endpoints[position]
+        column = self._graph._endpoints0 if position == 0 else self._graph._endpoints1
+        return self._graph._get_node_object(int(column[self._edge_id]))
 
     def __str__(self):
-        return f"{self.endpoints[0].getValue()}---< w = {self.weight} >---{self.endpoints[1].getValue()}"
+        return f"{self.endpoint0.getValue()}---< w = {self.weight} >---{self.endpoint1.getValue()}"
 
     def __eq__(self, other: _Edge):
         comp = [
-            self.endpoints == other.endpoints,
+            self.endpoint0 == other.endpoint0,
+            self.endpoint1 == other.endpoint1,
             self.weight == other.weight
         ]
 
         return False not in comp
 
 
+class _UnionFind:
+    """Disjoint sets of the indexes 0..size-1, with path halving and union by size"""
+
+    def __init__(self, size: int) -> None:
+        self.parents = list(range(size))
+        self.sizes = [1 for _ in range(size)]
+
+    def find(self, idx: int) -> int:
+        parents = self.parents
+        while parents[idx] != idx:
+            parents[idx] = parents[parents[idx]]
+            idx = parents[idx]
+        return idx
+
+    def union(self, idx_1: int, idx_2: int) -> bool:
+        """Joins the sets of idx_1 and idx_2, returns False if they were already joined"""
+
+        root_1, root_2 = self.find(idx_1), self.find(idx_2)
+        if root_1 == root_2:
+            return False
+        if self.sizes[root_1] < self.sizes[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.parents[root_2] = root_1
+        self.sizes[root_1] += self.sizes[root_2]
+        return True
+
+
 class Graph:
-    """"""
+    """
+    Undirected weighted graph. Node values are unique (hashable) keys.
+
+    Storage is struct-of-arrays: Node values are kept in a list (their index is their
+    position), Edges in int32 endpoint columns and a float64 weight column that grow
+    geometrically. _Node and _Edge objects are only created when asked for, the _Edge
+    objects are views that read and write the Edge columns. Per-Node maps of neighbours
+    to Edge ids are built on the first lookup that needs them, so lookups are O(1) or
+    O(degree). Searches run over a CSR layout of the Edges, rebuilt after any change.
+    """
+
+    _INITIAL_CAPACITY = 16
 
     def __init__(self):
-        self.nodes = []
-        self.edges = []
+        self._values = []  # Node index -> value, removed Nodes stay as holes
+        self._index = {}  # value -> Node index, in insertion order
+
+        self._endpoints0 = np.empty(self._INITIAL_CAPACITY, dtype=np.int32)
+        self._endpoints1 = np.empty(self._INITIAL_CAPACITY, dtype=np.int32)
+        self._weights = np.empty(self._INITIAL_CAPACITY, dtype=np.float64)
+        self._alive = np.empty(self._INITIAL_CAPACITY, dtype=bool)
+        self._edge_count = 0  # used rows of the Edge columns, removed Edges included
+
+        self._adjacency = None  # Node index -> {neighbour index: [Edge id, ...]}, built when needed
+        self._csr = None  # (indptr, indices, weights) arrays of the neighbours of every Node, built when needed, dropped on any change
+        self._node_objects = {}  # Node index -> _Node, created when asked for
+        self._edge_objects = {}  # Edge id -> _Edge, created when asked for
+
+    @property
+    def nodes(self) -> list[_Node]:
+        """Nodes in insertion order"""
+
+        return [self._get_node_object(idx) for idx in self._index.values()]
+
+    @property
+    def edges(self) -> list[_Edge]:
+        """Edges in insertion order"""
+
+        return [self._get_edge_object(edge_id) for edge_id in self._get_alive_edge_ids()]
+
+    def _get_node_object(self, idx: int) -> _Node:
+        if idx not in self._node_objects:
+            self._node_objects[idx] = _Node(value=self._values[idx])
+        return self._node_objects[idx]
+
+    def _get_edge_object(self, edge_id: int) -> _Edge:
+        if edge_id not in self._edge_objects:
+            self._edge_objects[edge_id] = _Edge(endpoint0=None, endpoint1=None, graph=self, edge_id=edge_id)
+        return self._edge_objects[edge_id]
+
+    def _set_edge_weight(self, edge_id: int, weight: int | float) -> None:
+        self._weights[edge_id] = weight
+        self._csr = None
+
+    def _set_edge_endpoint(self, edge_id: int, value, position: int) -> None:
+        if value not in self._index:
+            raise ValueError(f"{value} is not a Node of the Graph")
+
+        column = self._endpoints0 if position == 0 else self._endpoints1
+        column[edge_id] = self._index[value]
+        self._adjacency = None
+        self._csr = None
+
+    def _get_alive_edge_ids(self) -> np.ndarray:
+        return np.flatnonzero(self._alive[:self._edge_count])
+
+    def _get_adjacency(self) -> list[dict]:
+        """Builds the neighbour maps from the Edge columns if they are not up to date"""
+
+        if self._adjacency is None:
+            adjacency = [{} for _ in range(len(self._values))]
+            edge_ids = self._get_alive_edge_ids()
+            for edge_id, idx0, idx1 in zip(edge_ids.tolist(), self._endpoints0[edge_ids].tolist(), self._endpoints1[edge_ids].tolist()):
+                adjacency[idx0].setdefault(idx1, []).append(edge_id)
+                if idx1 != idx0:
+                    adjacency[idx1].setdefault(idx0, []).append(edge_id)
+            self._adjacency = adjacency
+
+        return self._adjacency
+
+    def _get_csr(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Builds the CSR layout of the Edges if it is not up to date: the neighbour indexes
+        and the weights of the Node at index i are indices[indptr[i]:indptr[i + 1]] and
+        weights[indptr[i]:indptr[i + 1]], in insertion order of the Edges
+        """
+
+        if self._csr is None:
+            edge_ids = self._get_alive_edge_ids()
+            idxs0, idxs1, weights = self._endpoints0[edge_ids], self._endpoints1[edge_ids], self._weights[edge_ids]
+            not_loop = idxs0 != idxs1  # self loops are stored once
+            rows = np.concatenate([idxs0, idxs1[not_loop]])
+            order = np.argsort(rows, kind='stable')
+
+            indptr = np.zeros(len(self._values) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=len(self._values)), out=indptr[1:])
+            self._csr = (
+                indptr,
+                np.concatenate([idxs1, idxs0[not_loop]])[order],
+                np.concatenate([weights, weights[not_loop]])[order]
+            )
+
+        return self._csr
+
+    def _reserve(self, count: int) -> None:
+        """Grows the Edge columns (doubling them) to fit `count` more Edges"""
+
+        needed = self._edge_count + count
+        capacity = len(self._weights)
+        if needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+        for name in ('_endpoints0', '_endpoints1', '_weights', '_alive'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._edge_count] = column[:self._edge_count]
+            setattr(self, name, grown)
 
     def addNode(self, value):
-        """Adds a Node with a `value` to the Graph"""
+        """Adds a Node with a `value` to the Graph, if there is no Node with that value yet"""
 
-        self.nodes.append(_Node(value=value))
+        if value not in self._index:
+            self._index[value] = len(self._values)
+            self._values.append(value)
+            if self._adjacency is not None:
+                self._adjacency.append({})
+            self._csr = None
 
-    def getNode(self, value):
-        """Returns the first appearance of a Node which value matches the `value` parameter."""
+    def add_nodes_from(self, values) -> None:
+        """Adds a Node for every value of `values` (an iterable or a NumPy array) not in the Graph yet"""
 
-        for n in self.nodes:
-            if n.getValue() == value:
-                return n
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
 
-        return None
+        for value in values:
+            if value not in self._index:
+                self._index[value] = len(self._values)
+                self._values.append(value)
+                if self._adjacency is not None:
+                    self._adjacency.append({})  # new Nodes have no Edges yet
+        self._csr = None
+
+    def getNode(self, value):
+        """Returns the Node which value matches the `value` parameter, None if there is none."""
+
+        idx = self._index.get(value)
+        return None if idx is None else self._get_node_object(idx)
 
     def hasNode(self, value) -> bool:
         """Returns True if the Graph contains a Node with value `value`, returns False otherwise."""
 
-        for n in self.nodes:
-            if n.getValue() == value:
-                return True
-
-        return False
+        return value in self._index
 
     def removeNode(self, value) -> bool:
         """
-        Removes the first appearance of a Node which value matches the `value` parameter.
+        Removes the Node which value matches the `value` parameter, and the Edges connected to it.
         Returns True if a Node was removed, returns False otherwise.
         """
 
-        idx_to_pop = -1
-        for n_idx, n in enumerate(self.nodes):
-            if n.getValue() == value:
-                idx_to_pop = n_idx
-                break
+        if value not in self._index:
+            return False
 
-        if idx_to_pop != -1:
-            # TO-DO: remove edges connected to Node
-            self.nodes.pop(idx_to_pop)
-            return True
+        adjacency = self._get_adjacency()
+        idx = self._index.pop(value)
+        for neighbour_idx, edge_ids in adjacency[idx].items():
+            self._alive[edge_ids] = False
+            for edge_id in edge_ids:
+                self._edge_objects.pop(edge_id, None)
+            if neighbour_idx != idx:
+                del adjacency[neighbour_idx][idx]
+        adjacency[idx] = {}
+        self._node_objects.pop(idx, None)
+        self._csr = None
 
-        return False
+        return True
 
     def addEdge(self, value0, value1, weight: int | float = 1):
         """Adds an Edge that connects `value0` and `value1` (if the Nodes exist) with `weight` to the Graph."""
 
-        if self.hasNode(value0) and self.hasNode(value1):
-            edge = _Edge(endpoint0=self.getNode(value0), endpoint1=self.getNode(value1), weight=weight)
-            self.edges.append(edge)
+        if value0 in self._index and value1 in self._index:
+            idx0, idx1 = self._index[value0], self._index[value1]
+            self._reserve(1)
+            edge_id = self._edge_count
+            self._endpoints0[edge_id] = idx0
+            self._endpoints1[edge_id] = idx1
+            self._weights[edge_id] = weight
+            self._alive[edge_id] = True
+            self._edge_count += 1
+            self._csr = None
+
+            if self._adjacency is not None:
+                self._adjacency[idx0].setdefault(idx1, []).append(edge_id)
+                if idx1 != idx0:
+                    self._adjacency[idx1].setdefault(idx0, []).append(edge_id)
+
+    def add_edges_from(self, edges) -> None:
+        """
+        Adds Edges in bulk. `edges` is an iterable of (value0, value1) or (value0, value1, weight)
+        tuples, or a NumPy array with those columns (weight 1 if missing). Edges with an endpoint
+        not in the Graph are skipped, as addEdge does.
+        """
+
+        if isinstance(edges, np.ndarray):
+            if edges.size == 0:
+                return
+            values0, values1 = edges[:, 0].tolist(), edges[:, 1].tolist()
+            weights = edges[:, 2] if edges.shape[1] > 2 else 1
+        else:
+            edges = list(edges)
+            if not edges:
+                return
+            values0, values1 = [e[0] for e in edges], [e[1] for e in edges]
+            weights = [e[2] if len(e) > 2 else 1 for e in edges]
+
+        idxs0 = np.fromiter((self._index.get(value, -1) for value in values0), dtype=np.int32, count=len(values0))
+        idxs1 = np.fromiter((self._index.get(value, -1) for value in values1), dtype=np.int32, count=len(values1))
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), idxs0.shape)
+        keep = (idxs0 >= 0) & (idxs1 >= 0)
+        count = int(keep.sum())
+
+        self._reserve(count)
+        rows = slice(self._edge_count, self._edge_count + count)
+        self._endpoints0[rows] = idxs0[keep]
+        self._endpoints1[rows] = idxs1[keep]
+        self._weights[rows] = weights[keep]
+        self._alive[rows] = True
+        self._edge_count += count
+        self._adjacency = None
+        self._csr = None
+
+    def _get_edge_ids(self, value0, value1) -> list[int]:
+        """Returns the ids of the Edges between `value0` and `value1`, in insertion order"""
+
+        if value0 not in self._index or value1 not in self._index:
+            return []
+        return self._get_adjacency()[self._index[value0]].get(self._index[value1], [])
 
     def hasEdge(self, value0, value1, weight: int | float = 1) -> bool:
         """Returns True if the Graph contains an Edge with values `value0` and `value1`, and weight `weight`,
         returns False otherwise."""
 
-        if self.hasNode(value0) and self.hasNode(value1):
-            edge = _Edge(endpoint0=self.getNode(value0), endpoint1=self.getNode(value1), weight=weight)
-            if edge in self.edges:
+        idx0 = self._index.get(value0)
+        for edge_id in self._get_edge_ids(value0, value1):
+            if self._endpoints0[edge_id] == idx0 and self._weights[edge_id] == weight:
                 return True
 
         return False
@@ -132,14 +400,8 @@ class Graph:
     def getEdge(self, value0, value1) -> _Edge | None:
         """Returns the first appearance of an Edge which values matches the `value0` and `value1` parameters."""
 
-        if self.hasNode(value0) and self.hasNode(value1):
-            for e in self.edges:
-                ep0 = e.getEndpoint(0).getValue()
-                ep1 = e.getEndpoint(1).getValue()
-                if (ep0 == value0 and ep1 == value1) or (ep0 == value1 and ep1 == value0):
-                    return e
-
-        return None
+        edge_ids = self._get_edge_ids(value0, value1)
+        return self._get_edge_object(edge_ids[0]) if edge_ids else None
 
     def removeEdge(self, value0, value1) -> bool:
         """
@@ -147,20 +409,158 @@ class Graph:
         Returns True if an Edge was removed, returns False otherwise.
         """
 
-        if self.hasNode(value0) and self.hasNode(value1):
-            idx_to_pop = -1
-            for e_idx, e in enumerate(self.edges):
-                ep0 = e.getEndpoint(0).getValue()
-                ep1 = e.getEndpoint(1).getValue()
-                if (ep0 == value0 and ep1 == value1) or (ep0 == value1 and ep1 == value0):
-                    idx_to_pop = e_idx
+        edge_ids = self._get_edge_ids(value0, value1)
+        if not edge_ids:
+            return False
+
+        edge_id = edge_ids[0]
+        self._alive[edge_id] = False
+        self._edge_objects.pop(edge_id, None)
+        self._csr = None
+
+        adjacency = self._adjacency
+        idx0, idx1 = self._index[value0], self._index[value1]
+        sides = [(idx0, idx1)] if idx0 == idx1 else [(idx0, idx1), (idx1, idx0)]  # self loops are stored once
+        for i0, i1 in sides:
+            adjacency[i0][i1].remove(edge_id)
+            if not adjacency[i0][i1]:
+                del adjacency[i0][i1]
+
+        return True
+
+    def getNeighbours(self, value) -> list:
+        """Returns the values of the Nodes connected to `value`, in insertion order."""
+
+        if value not in self._index:
+            return []
+        return [self._values[idx] for idx in self._get_adjacency()[self._index[value]]]
+
+    def dijkstra(self, source, target=None, within=None) -> tuple[dict, dict]:
+        """
+        Heap based Dijkstra from `source`, O(E log V). Stops as soon as `target` is settled if given.
+        Returns two dicts: value -> distance from source, and value -> previous value
+        in its shortest path (source -> None). Only settled Nodes are in them, in settle order.
+
+        :param within: Values of the Nodes the search is restricted to (the subgraph they
+            induce), all the Nodes if None. `source` is always walked.
+        """
+
+        distances, previous = {}, {}
+        if source not in self._index:
+            return distances, previous
+
+        indptr, indices, weights = self._get_csr()
+        target_idx = self._index.get(target, -1) if target is not None else -1
+        inside = None if within is None else {self._index[value] for value in within if value in self._index}
+
+        source_idx = self._index[source]
+        best = {source_idx: 0.0}  # Node index -> best distance found, final once settled
+        parents = {source_idx: -1}  # Node index -> previous Node index of its best distance
+        settled = {}  # Node index -> None, in settle order
+        heap = [(0.0, source_idx)]
+        while heap:
+            d, idx = heappop(heap)
+            if idx in settled:
+                continue
+            settled[idx] = None
+            if idx == target_idx:
+                break
+
+            start, stop = indptr[idx:idx + 2].tolist()
+            for neighbour_idx, weight in zip(indices[start:stop].tolist(), weights[start:stop].tolist()):
+                if neighbour_idx in settled or (inside is not None and neighbour_idx not in inside):
+                    continue
+                nd = d + weight
+                if neighbour_idx not in best or nd < best[neighbour_idx]:
+                    best[neighbour_idx] = nd
+                    parents[neighbour_idx] = idx
+                    heappush(heap, (nd, neighbour_idx))
+
+        values = self._values
+        for idx in settled:
+            distances[values[idx]] = best[idx]
+            prev_idx = parents[idx]
+            previous[values[idx]] = None if prev_idx == -1 else values[prev_idx]
+
+        return distances, previous
+
+    def shortestPath(self, value0, value1) -> tuple[int | float, list] | None:
+        """Returns (distance, [value0, ..., value1]) of the shortest path between `value0` and `value1`,
+        None if they are not connected."""
+
+        distances, previous = self.dijkstra(value0, target=value1)
+        if value1 not in distances:
+            return None
+
+        path = [value1]
+        while previous[path[-1]] is not None:
+            path.append(previous[path[-1]])
+        path.reverse()
+
+        return distances[value1], path
+
+    def minimumSpanningTree(self) -> list[_Edge]:
+        """
+        Kruskal with union-find, O(E log V). Returns the Edges of a minimum spanning
+        forest (one tree per connected component), lightest first.
+        """
+
+        edge_ids = self._get_alive_edge_ids()
+        edge_ids = edge_ids[np.argsort(self._weights[edge_ids], kind='stable')]  # ties in insertion order
+        union_find = _UnionFind(len(self._values))
+
+        tree = []
+        for edge_id, idx0, idx1 in zip(edge_ids.tolist(), self._endpoints0[edge_ids].tolist(), self._endpoints1[edge_ids].tolist()):
+            if union_find.union(idx0, idx1):
+                tree.append(self._get_edge_object(edge_id))
+                if len(tree) == len(self._index) - 1:
                     break
 
-            if idx_to_pop != -1:
-                self.edges.pop(idx_to_pop)
-                return True
+        return tree
 
-        return False
+    def connectedComponents(self, within=None) -> list[list]:
+        """Returns the values of the Nodes of every connected component, O(E + V) with union-find.
+        Components and their values follow the insertion order of the Nodes.
+
+        :param within: Values of the Nodes the components are restricted to (the subgraph they
+            induce), all the Nodes if None. Components and their values then follow its order,
+            and it costs O(degree) per Node in it.
+        """
+
+        if within is None:
+            union_find = _UnionFind(len(self._values))
+            edge_ids = self._get_alive_edge_ids()
+            for idx0, idx1 in zip(self._endpoints0[edge_ids].tolist(), self._endpoints1[edge_ids].tolist()):
+                union_find.union(idx0, idx1)
+
+            components = {}  # root -> values
+            for value, idx in self._index.items():
+                components.setdefault(union_find.find(idx), []).append(value)
+
+            return list(components.values())
+
+        indptr, indices, _ = self._get_csr()
+        idxs = list(dict.fromkeys(self._index[value] for value in within if value in self._index))
+        idxs = np.asarray(idxs, dtype=np.int64)
+        position = np.full(len(self._values), -1, dtype=np.int64)  # Node index -> position in within
+        position[idxs] = np.arange(len(idxs))
+
+        # Edge ends leaving the Nodes of within, kept once per Edge between two of them
+        starts, counts = indptr[idxs], indptr[idxs + 1] - indptr[idxs]
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        positions0 = np.repeat(np.arange(len(idxs)), counts)
+        positions1 = position[indices[offsets]]
+        keep = positions1 > positions0
+
+        union_find = _UnionFind(len(idxs))
+        for i, j in zip(positions0[keep].tolist(), positions1[keep].tolist()):
+            union_find.union(i, j)
+
+        components = {}  # root -> values
+        for i, idx in enumerate(idxs.tolist()):
+            components.setdefault(union_find.find(i), []).append(self._values[idx])
+
+        return list(components.values())
 
     def __str__(self):
         text = 'Nodes:\n'
@@ -194,6 +594,70 @@ def _tests():
     assert g.removeNode(5)
     print(g)
 
+    # removing a Node removes its Edges
+    g.addEdge(4, 2, 2)
+    g.addEdge(4, 4)
+    g.addEdge(4, 4)
+    assert g.removeEdge(4, 4) and g.hasEdge(4, 4)
+    assert g.removeNode(4)
+    assert not g.hasNode(4)
+    assert g.getEdge(3, 4) is None and g.getEdge(2, 4) is None
+    assert [str(e) for e in g.edges] == ['2---< w = 0.3 >---3']
+    assert g.getNeighbours(3) == [2]
+    assert not g.removeEdge(3, 4)
+
+    # algorithms
+    g = Graph()
+    for v in 'abcdef':
+        g.addNode(v)
+    g.addEdge('a', 'b', 4)
+    g.addEdge('a', 'c', 1)
+    g.addEdge('c', 'b', 2)
+    g.addEdge('b', 'd', 5)
+    g.addEdge('c', 'd', 8)
+    g.addEdge('e', 'f', 1)
+    assert g.shortestPath('a', 'd') == (8, ['a', 'c', 'b', 'd'])
+    assert g.shortestPath('a', 'e') is None
+    distances, _ = g.dijkstra('a', target='b')
+    assert distances['b'] == 3 and 'd' not in distances  # early exit
+    distances, _ = g.dijkstra('a', within=['a', 'b', 'd'])
+    assert distances == {'a': 0, 'b': 4, 'd': 9}  # c is out of the subgraph
+    assert [str(e) for e in g.minimumSpanningTree()] == ['a---< w = 1.0 >---c', 'e---< w = 1.0 >---f', 'c---< w = 2.0 >---b', 'b---< w = 5.0 >---d']
+    assert g.connectedComponents() == [['a', 'b', 'c', 'd'], ['e', 'f']]
+
+    # bulk ingestion
+    g = Graph()
+    g.add_nodes_from(np.arange(5))
+    g.add_nodes_from([3, 4, 5])
+    g.add_edges_from(np.array([[0, 1, 2.5], [1, 2, 1], [2, 9, 1]]))  # 9 is not a Node, skipped
+    g.add_edges_from([(3, 4), (4, 5, 0.5)])
+    assert len(g.nodes) == 6 and len(g.edges) == 4
+    assert g.hasEdge(0, 1, 2.5) and g.hasEdge(3, 4, 1) and not g.hasEdge(2, 9)
+    assert g.shortestPath(0, 2) == (3.5, [0, 1, 2])
+    assert g.connectedComponents() == [[0, 1, 2], [3, 4, 5]]
+    assert g.connectedComponents(within=[4, 0, 3, 1, 9]) == [[4, 3], [0, 1]]  # 9 is not a Node
+    assert g.connectedComponents(within=[5, 0, 2, 3]) == [[5], [0], [2], [3]]  # 1 and 4 left out
+    g.addEdge(2, 3, 7)
+    assert g.getEdge(3, 2).weight == 7
+    adjacency = g._get_adjacency()
+    g.add_nodes_from([6, 7])
+    assert g._adjacency is adjacency and g.getNeighbours(6) == []  # not rebuilt
+    assert g.removeNode(1) and g.shortestPath(0, 2) is None
+
+    # Edges are views of the Graph storage
+    g = Graph()
+    g.add_nodes_from('abc')
+    g.add_edges_from([('a', 'b', 1), ('b', 'c', 1), ('a', 'c', 5)])
+    assert g.shortestPath('a', 'c') == (2, ['a', 'b', 'c'])
+    g.getEdge('a', 'b').weight = 10
+    assert g.hasEdge('a', 'b', 10) and g.shortestPath('a', 'c') == (5, ['a', 'c'])
+    g.getEdge('a', 'c').setEndpoint(g.getNode('b'), 1)
+    assert g.getNeighbours('c') == ['b'] and g.shortestPath('a', 'c') == (6, ['a', 'b', 'c'])
+    assert str(g.getEdge('b', 'a')) in ('a---< w = 10.0 >---b', 'a---< w = 5.0 >---b')
+    e = _Edge(_Node('x'), _Node('y'), 2)
+    e.weight = 3
+    assert str(e) == 'x---< w = 3 >---y'
+
     print("\033[32m _tests executed successfully \033[0m")
 
 
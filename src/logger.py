@@ -1,15 +1,125 @@
-from src.env import LOGGER_CLIO
+import json
+import atexit
+from time import time
+from weakref import WeakSet
+
+from src.env import LOGGER_CLIO, LOGGER_LEVEL
+
+
+# levels, a Logger writes the messages with level >= Logger.level
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+DISABLED = 100  # above every level, nothing is written
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+LOG_TYPES = ('cli', 'file', 'json')
+
+# 'file' and 'json' loggers still alive, flushed once at exit without keeping them alive
+_SINKS = WeakSet()
+
+
+@atexit.register
+def _flush_sinks() -> None:
+    for sink in list(_SINKS):
+        sink.flush()
 
 
 class Logger:
-    """Class in charge of managing the logging"""
+    """
+    Class in charge of managing the logging
+
+    Messages are formatted only when written: log('walker %s', walker) applies the %-style
+    args, and log(callable) calls it. Hot loops can skip the call altogether with
+    `if self.l.level <= DEBUG: ...`, an integer comparison.
+    """
+
+    def __init__(self, log_type: str = 'cli', level: int = None, file_path: str = None, buffer_size: int = 256) -> None:
+        """
+        :param log_type: 'cli' prints the messages (if LOGGER_CLIO), 'file' appends them
+            to file_path as text lines, 'json' appends them to file_path as JSON lines
+            ({"time", "level", "message"})
+        :param level: Lowest level written, LOGGER_LEVEL if not given
+        :param file_path: Sink of the 'file' and 'json' loggers
+        :param buffer_size: Messages the 'file' and 'json' loggers keep before writing them,
+            they are also written by flush, when the logger is collected and at exit
+        """
+
+        if log_type not in LOG_TYPES:
+            raise ValueError(f"Unknown log type {log_type}, it must be one of {list(LOG_TYPES)}")
+        if log_type != 'cli' and file_path is None:
+            raise ValueError(f"A '{log_type}' logger needs a file_path")
 
-    def __init__(self, log_type: str = 'cli') -> None:
         self.log_type = log_type
+        self.file_path = file_path
+        self.buffer_size = buffer_size
+        self._buffer = []
+
+        self.level = LOGGER_LEVEL if level is None else level
+        if log_type == 'cli' and not LOGGER_CLIO:
+            self.level = DISABLED
+
+        if log_type != 'cli':
+            _SINKS.add(self)
+
+    def __del__(self) -> None:
+        if self._buffer:
+            self.flush()
 
     def _cli_log(self, text: str) -> None:
         print(text)
 
-    def log(self, text: str) -> None:
-        if self.log_type == 'cli' and LOGGER_CLIO:
+    def _buffer_log(self, text: str, level: int) -> None:
+        if self.log_type == 'json':
+            text = json.dumps({'time': time(), 'level': LEVEL_NAMES.get(level, level), 'message': text})
+        self._buffer.append(text)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def log(self, text, *args, level: int = INFO) -> None:
+        """
+        :param text: Message, %-formatted with args if given, or a callable returning the message
+        """
+
+        if level < self.level:
+            return
+
+        if callable(text):
+            text = text()
+        elif args:
+            text = text % args
+        else:
+            text = str(text)
+
+        if self.log_type == 'cli':
             self._cli_log(text=text)
+        else:
+            self._buffer_log(text=text, level=level)
+
+    def debug(self, text, *args) -> None:
+        if DEBUG >= self.level:
+            self.log(text, *args, level=DEBUG)
+
+    def info(self, text, *args) -> None:
+        if INFO >= self.level:
+            self.log(text, *args, level=INFO)
+
+    def warning(self, text, *args) -> None:
+        if WARNING >= self.level:
+            self.log(text, *args, level=WARNING)
+
+    def error(self, text, *args) -> None:
+        if ERROR >= self.level:
+            self.log(text, *args, level=ERROR)
+
+    def flush(self) -> None:
+        """Writes the buffered messages of the 'file' and 'json' loggers"""
+
+        if not self._buffer:
+            return
+
+        with open(self.file_path, 'a') as log_file:
+            log_file.write('\n'.join(self._buffer) + '\n')
+        self._buffer = []
@@ -7,15 +7,22 @@ from shapely.ops import (
     GeometryCollection,
     nearest_points
 )
-from shapely import unary_union, intersection
+from shapely import unary_union, intersection, to_wkb
 
-from os.path import join
+from hashlib import sha1
+from glob import glob, escape as glob_escape
+from os import remove
+from os.path import join, exists, dirname
 
 from src.env import SHP_PATH
-from src.path_finder2 import _SegmentWalker, _Walk, path_finder
+from src.path_finder2 import _SegmentWalker, _Walk, _StrandTopology, path_finder
 from src.fat_graph import FATGraph
 from src.fat_graph_constructor_thread import FATGraphConstructorThread
 from src.path_finder_thread import PathFinderThread
+from src.all_paths_finder_thread import AllPathsFinderThread
+from src.parallel_path_finder_thread import ParallelPathFinderThread
+from src.paths_writer import PathsWriter
+from src.snapping import snap_to_line_ends
 from src.fat_graph_grouper_thread import FATGraphGrouperThread
 from src.clic import red, green, orange
 
@@ -23,8 +30,25 @@ from src.clic import red, green, orange
 class MainThread:
     """This class in only meant for simulating the main thread"""
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, path_finder_engine: str = 'walk', workers: int = 1, resume: bool = False, 
+                 grouping_strategy: str = 'greedy') -> None:
+        """
+        :param path_finder_engine: 'walk' runs a PathFinderThread for every FAT, 
+            'dijkstra' finds the paths between all FATs at once with an AllPathsFinderThread
+        :param workers: Number of processes the 'walk' engine runs the FATs in, and the 
+            connected components are grouped in. 1 runs them one after another, None uses all the CPUs
+        :param resume: If True, the FATs already in all_paths.gpkg are skipped, 
+            otherwise all_paths.gpkg is written from scratch
+        :param grouping_strategy: 'greedy' or 'bisection', see FATGraphGrouperThread
+        """
+
+        if path_finder_engine not in ('walk', 'dijkstra'):
+            raise ValueError(f"Unknown path finder engine {path_finder_engine}")
+
+        self.path_finder_engine = path_finder_engine
+        self.workers = workers
+        self.resume = resume
+        self.grouping_strategy = grouping_strategy
 
     def run(self):
         print(green('RUNNING MAIN THREAD'))
@@ -36,21 +60,8 @@ class MainThread:
 
         path = list(path_gdf.geometry)
 
-        path_ends = []
-        for p_idx, p in enumerate(path):
-            print(f"\tcollecting line ends ( {p_idx + 1} / {len(path)} \t|\t{int((p_idx + 1) * 100 / len(path))} % )")
-            p1 = Point(p.coords[0])
-            p2 = Point(p.coords[-1])
-            if p1 not in path_ends:
-                path_ends.append(p1)
-            if p2 not in path_ends:
-                path_ends.append(p2)
-        path_ends = unary_union(path_ends)
-
-        print("\tsnapping")
-        for i in range(fats_gdf.index.size):
-            fats_gdf.loc[i, 'geometry'] = nearest_points(path_ends, fats_gdf.loc[i, 'geometry'])[0]
-
+        print(f"\tsnapping {fats_gdf.index.size} FATs to the ends of {len(path)} lines")
+        fats_gdf['geometry'] = snap_to_line_ends(fats_gdf.geometry.values, path)
 
         print(green('geometries collected'))
 
@@ -58,24 +69,47 @@ class MainThread:
         find_paths = False
 
         meter = 0.00001
+        paths_writer = PathsWriter(file_path=join(SHP_PATH, 'all_paths.gpkg'), crs=4326, resume=self.resume or not find_paths)
         if find_paths:
-            all_paths = []
-            for i in range(fats_gdf.index.size): 
+            done_fats = paths_writer.get_done_fats()
+            fat_idxs = [i for i in range(fats_gdf.index.size) if fats_gdf.loc[i, 'Numero_NAP'] not in done_fats]
+            print(f"\t{len(fat_idxs)} FATs to walk, {fats_gdf.index.size - len(fat_idxs)} already done")
+
+            if self.path_finder_engine == 'dijkstra':
+                apft = AllPathsFinderThread(
+                    fats_gdf=fats_gdf,
+                    fats_id_col='Numero_NAP',
+                    path=path,
+                    tolerance=meter * 0.5
+                )
+                results = apft.find_paths_by_fat(fat_idxs)
+            elif self.workers == 1:
+                topology = _StrandTopology(lines=path, tolerance=meter * 0.5)
+                results = self._find_paths_from_each_fat(fats_gdf, path, meter * 0.5, topology, fat_idxs)
+            else:
+                ppft = ParallelPathFinderThread(
+                    fats_gdf=fats_gdf,
+                    fats_id_col='Numero_NAP',
+                    path=path,
+                    tolerance=meter * 0.5,
+                    workers=self.workers,
+                    topology=_StrandTopology(lines=path, tolerance=meter * 0.5)
+                )
+                results = ppft.run(fat_idxs)
+
+            for i, paths_found in results:  # in FAT order
                 try:
-                    pft = PathFinderThread(
-                        source_fat_gdf=fats_gdf,
-                        source_fat_id_col='Numero_NAP',
-                        source_fat_idx=i,
-                        path=path,
-                        tolerance=meter * 0.5
-                    )
-                    paths_found = pft.run()
+                    if paths_found is None:
+                        raise Exception(f"path finding failed in FAT {i}")
 
                     print(f"{paths_found}\n")
 
-                    all_paths += paths_found
-                    all_paths_gdf = gpd.GeoDataFrame({'geometry': all_paths}, crs=4326)
-                    all_paths_gdf.to_file(join(SHP_PATH, 'all_paths.shp'))
+                    # only the new paths are appended
+                    paths_writer.append(
+                        source_fat=fats_gdf.loc[i, 'Numero_NAP'],
+                        source_geom=fats_gdf.loc[i, 'geometry'],
+                        paths=paths_found
+                    )
                 except Exception:
                     print(red(f"ERROR IN FAT {i}\n"))
                     try:
@@ -84,29 +118,40 @@ class MainThread:
                         continue
                     except Exception:
                         continue
+            all_paths_gdf = paths_writer.read()
             print(green('walk ended'))
         else:
-            all_paths_gdf = gpd.read_file(join(SHP_PATH, 'all_paths.shp'))
+            all_paths_gdf = self._read_all_paths(paths_writer, join(SHP_PATH, 'all_paths.shp'))
             print(green('paths read'))
 
         
 
         # create/collect graph
-        fatgct = FATGraphConstructorThread(
-            fats_gdf=fats_gdf,
-            fats_id_column='Numero_NAP',
-            all_paths_gdf=all_paths_gdf,
-            tolerance=meter * 0.1
-        )
-        fat_graph = fatgct.run()
-        print(fat_graph)
-        print(green('graph constructed'))
+        fingerprint = self._get_graph_fingerprint(fats_gdf, 'Numero_NAP', all_paths_gdf, meter * 0.1)
+        fat_graph_path = join(SHP_PATH, f'fat_graph_{fingerprint}.fatg')
+        if exists(fat_graph_path):
+            fat_graph = FATGraph.load(fat_graph_path)
+            print(green('graph loaded'))
+        else:
+            fatgct = FATGraphConstructorThread(
+                fats_gdf=fats_gdf,
+                fats_id_column='Numero_NAP',
+                all_paths_gdf=all_paths_gdf,
+                tolerance=meter * 0.1,
+                storage='sparse'
+            )
+            fat_graph = fatgct.run()
+            print(fat_graph)
+            self._save_fat_graph(fat_graph, fat_graph_path)
+            print(green('graph constructed'))
 
 
         # find groups by n
         fatggt = FATGraphGrouperThread(
             fat_graph=fat_graph,
-            n=16
+            n=16,
+            workers=self.workers,
+            strategy=self.grouping_strategy
         )
         groups = fatggt.run()
 
@@ -121,4 +166,89 @@ class MainThread:
         group_paths_gdf = gpd.GeoDataFrame(groups_dict, crs=4326)
         group_paths_gdf.to_file(join(SHP_PATH, 'group_paths.shp'))
 
-        print(green('groups done'))
\ No newline at end of file
+        print(green('groups done'))
+
+    @staticmethod
+    def _read_all_paths(paths_writer: PathsWriter, legacy_file_path: str) -> gpd.GeoDataFrame:
+        """
+        Reads the paths of paths_writer, or the ones of the legacy shapefile 
+        (written before the paths were streamed to a GeoPackage) if there is no GeoPackage. 
+        Raises FileNotFoundError if there are neither
+        """
+
+        try:
+            return paths_writer.read()
+        except FileNotFoundError:
+            if not exists(legacy_file_path):
+                raise
+            print(orange(f"\tno GeoPackage of paths, reading {legacy_file_path}"))
+            return gpd.read_file(legacy_file_path)
+
+    @staticmethod
+    def _save_fat_graph(fat_graph: FATGraph, fat_graph_path: str) -> None:
+        """
+        Caches fat_graph in fat_graph_path, removing the graphs cached next to it for 
+        other fingerprints. The cache is best effort: a graph that can't be saved 
+        (e.g. FATs not named by str or int) is only warned about
+        """
+
+        for stale_path in glob(join(glob_escape(dirname(fat_graph_path)), 'fat_graph_*.fatg')):
+            try:
+                remove(stale_path)
+            except OSError as e:
+                print(orange(f"\tstale graph {stale_path} not removed: {e}"))
+
+        try:
+            fat_graph.save(fat_graph_path)
+        except (ValueError, OSError) as e:
+            print(orange(f"\tgraph not cached: {e}"))
+            if exists(fat_graph_path):
+                remove(fat_graph_path)
+
+    @staticmethod
+    def _get_graph_fingerprint(
+            fats_gdf: gpd.GeoDataFrame, 
+            fats_id_col: str, 
+            all_paths_gdf: gpd.GeoDataFrame, 
+            tolerance: float | int
+    ) -> str:
+        """
+        Returns a hash of everything the FATGraph is constructed from (FAT ids and 
+        geometries, paths and tolerance), naming its cached file
+        """
+
+        fingerprint = sha1(repr(tolerance).encode('utf-8'))
+        fingerprint.update('\0'.join(map(str, fats_gdf[fats_id_col])).encode('utf-8'))
+        for geometries in (fats_gdf.geometry.values, all_paths_gdf.geometry.values):
+            fingerprint.update(b'\0'.join(wkb or b'' for wkb in to_wkb(geometries)))
+        for col in all_paths_gdf.columns.drop(all_paths_gdf.geometry.name):
+            fingerprint.update('\0'.join(map(str, all_paths_gdf[col])).encode('utf-8'))
+
+        return fingerprint.hexdigest()[:16]
+
+    def _find_paths_from_each_fat(
+            self, 
+            fats_gdf: gpd.GeoDataFrame, 
+            path: list[LineString], 
+            tolerance: float | int,
+            topology: _StrandTopology,
+            fat_idxs: list[int]
+    ):
+        """
+        Runs a PathFinderThread for every FAT in fat_idxs, one after another. 
+        Yields a tuple (FAT index, paths found), paths found is None if the search failed.
+        """
+
+        for i in fat_idxs: 
+            try:
+                pft = PathFinderThread(
+                    source_fat_gdf=fats_gdf,
+                    source_fat_id_col='Numero_NAP',
+                    source_fat_idx=i,
+                    path=path,
+                    tolerance=tolerance,
+                    topology=topology
+                )
+                yield i, pft.run()
+            except Exception:
+                yield i, None
\ No newline at end of file
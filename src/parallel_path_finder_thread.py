@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import geopandas as gpd
+from shapely.ops import LineString
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+from typing import Iterator
+
+from src.clic import red, green, orange, magenta
+from src.path_finder2 import _StrandTopology
+from src.path_finder_thread import PathFinderThread
+
+
+# state of the workers, set before the pool is created so forked workers inherit it
+# instead of receiving the strands and the FAT table pickled with every task
+_worker_state = {}
+
+
+def _init_worker(state: dict = None) -> None:
+    """Pool initializer, only receives the state when workers can't be forked"""
+
+    if state is not None:
+        _worker_state.update(state)
+
+
+def _find_paths_from(source_fat_idx: int) -> tuple[int, list[LineString] | None]:
+    """
+    Runs a PathFinderThread for a source FAT inside a worker.
+
+    :return: Tuple containing 0: source_fat_idx, 1: paths found (None if the search failed)
+    """
+
+    try:
+        pft = PathFinderThread(
+            source_fat_gdf=_worker_state['fats_gdf'],
+            source_fat_id_col=_worker_state['fats_id_col'],
+            source_fat_idx=source_fat_idx,
+            path=_worker_state['path'],
+            tolerance=_worker_state['tolerance'],
+            topology=_worker_state['topology']
+        )
+        return source_fat_idx, pft.run()
+    except Exception:
+        return source_fat_idx, None
+
+
+class ParallelPathFinderThread:  # (QThread):
+    """Thread in charge of finding the paths from every FAT, fanning the FATs out to a process pool"""
+
+    def __init__(
+            self,
+            fats_gdf: gpd.GeoDataFrame,
+            fats_id_col: str,
+            path: list[LineString],
+            tolerance: float | int = 0.1,
+            workers: int = None,
+            topology: _StrandTopology = None
+    ) -> None:
+        """
+        :param workers: Number of worker processes, the number of CPUs if None
+        :param topology: Prebuilt _StrandTopology of path, it is built if not given
+        """
+
+        self._fats_gdf = fats_gdf
+        self._fats_id_col = fats_id_col
+        self._path = path
+        self._tolerance = tolerance
+        self._workers = workers
+        self._topology = topology
+
+    def run(self, fat_idxs: list[int] = None) -> Iterator[tuple[int, list[LineString] | None]]:
+        return self.find_paths(fat_idxs)
+
+    def find_paths(self, fat_idxs: list[int] = None) -> Iterator[tuple[int, list[LineString] | None]]:
+        """
+        Yields a tuple (FAT index, paths found) for every FAT in fat_idxs (all FATs if None), 
+        in fat_idxs order. Paths found is None if the search from that FAT failed.
+        """
+
+        if fat_idxs is None:
+            fat_idxs = range(self._fats_gdf.index.size)
+
+        if self._topology is None:
+            self._topology = _StrandTopology(lines=self._path, tolerance=self._tolerance)
+
+        state = {
+            'fats_gdf': self._fats_gdf,
+            'fats_id_col': self._fats_id_col,
+            'path': self._path,
+            'tolerance': self._tolerance,
+            'topology': self._topology
+        }
+
+        if 'fork' in get_all_start_methods():
+            _worker_state.update(state)
+            context, initargs = get_context('fork'), (None,)
+        else:
+            context, initargs = get_context(), (state,)
+
+        try:
+            with ProcessPoolExecutor(max_workers=self._workers, mp_context=context, 
+                                     initializer=_init_worker, initargs=initargs) as executor:
+                # map keeps the FAT order no matter which worker ends first
+                yield from executor.map(_find_paths_from, fat_idxs, chunksize=1)
+        finally:
+            _worker_state.clear()
@@ -7,13 +7,132 @@ from shapely.ops import (
     GeometryCollection,
     nearest_points
 )
-from shapely import unary_union
+from shapely import unary_union, get_parts, get_coordinates, STRtree
 
+import numpy as np
+from bisect import bisect_right
 from os.path import join
 
 from src.env import SHP_PATH
 from src.clic import red, green, orange
-from src.logger import Logger
+from src.logger import Logger, DEBUG
+from src.simplify import remove_redundant_points
+from src.path_finder2 import _StrandTopology
+
+
+def _remove_obstacles(strands: list[LineString], obstacles: list, clearance: float) -> list[LineString]:
+    """
+    Removes the sections of the strands closer than clearance to the obstacles (Points, 
+    or Polygons for no-go areas). Only the strands near an obstacle (found with an 
+    STRtree) are cut, the rest are kept as they are.
+    """
+
+    if not obstacles or not strands:
+        return strands
+
+    obstacle_ids, strand_ids = STRtree(strands).query(obstacles, predicate='dwithin', distance=clearance)
+    near_obstacles = {}  # strand id -> ids of the obstacles near it
+    for obstacle_id, strand_id in zip(obstacle_ids.tolist(), strand_ids.tolist()):
+        near_obstacles.setdefault(strand_id, []).append(obstacle_id)
+
+    kept = []
+    for strand_id, strand in enumerate(strands):
+        if strand_id not in near_obstacles:
+            kept.append(strand)
+            continue
+        zone = unary_union([obstacles[obstacle_id].buffer(clearance) for obstacle_id in near_obstacles[strand_id]])
+        kept += [part for part in get_parts(strand.difference(zone)) if isinstance(part, LineString) and not part.is_empty]
+
+    return kept
+
+
+class _PathIndex:
+    """
+    Strands of the path in an STRtree, plus the sections of every strand already 
+    walked as sorted disjoint intervals of distance along the strand. Shared by all 
+    the _Walkers of a walk, so the path geometry is never copied. The sections of the 
+    strands closer than clearance to an obstacle are cut off once, when it is built.
+    """
+
+    def __init__(
+            self, 
+            path: MultiLineString | LineString, 
+            tolerance: float = 0.0, 
+            obstacles: list = None, 
+            clearance: float = 0.0
+    ) -> None:
+        """
+        :param tolerance: Positions closer than tolerance to the ends of a walked interval are on those ends, 
+            which are walkable unless they are ends of the strand
+        :param obstacles: List of shapely Points (blocked ducts) and Polygons (no-go areas)
+        :param clearance: Distance to the obstacles at which the strands are blocked
+        """
+
+        self._obstacles = obstacles if obstacles is not None else []
+        self._obstacles_tree = STRtree(self._obstacles) if self._obstacles else None
+        self._strands = _remove_obstacles(list(get_parts(path)), self._obstacles, clearance)
+        self._tree = STRtree(self._strands)
+        self._lengths = [strand.length for strand in self._strands]
+        self._tolerance = tolerance
+        self._visited = {}  # strand id -> (starts, ends), sorted and disjoint
+
+    def get_strands(self) -> list[LineString]:
+        return self._strands
+
+    def is_blocked(self, point: Point, distance: float) -> bool:
+        """Returns True if an obstacle is closer than distance (or at distance) to point"""
+
+        if self._obstacles_tree is None:
+            return False
+        return len(self._obstacles_tree.query(point, predicate='dwithin', distance=distance)) > 0
+
+    def query(self, point: Point, distance: float) -> list[int]:
+        """Returns the ids of the strands closer than distance to point"""
+
+        return sorted(self._tree.query(point, predicate='dwithin', distance=distance).tolist())
+
+    def get_strand(self, strand_id: int) -> LineString:
+        return self._strands[strand_id]
+
+    def is_visited(self, strand_id: int, arc: float) -> bool:
+        """
+        Returns True if the position at distance arc along the strand has been walked. 
+        The ends of a walked interval cut by a circle boundary are still walkable, but an 
+        end at a strand end (a junction swept by the circle) is walked
+        """
+
+        if strand_id not in self._visited:
+            return False
+        starts, ends = self._visited[strand_id]
+        i = bisect_right(starts, arc) - 1
+        if i < 0:
+            return False
+
+        tolerance = self._tolerance
+        if starts[i] <= tolerance:  # starts at the strand start
+            after_start = True
+        else:
+            after_start = arc > starts[i] + tolerance
+        if ends[i] >= self._lengths[strand_id] - tolerance:  # ends at the strand end
+            before_end = arc <= ends[i] + tolerance
+        else:
+            before_end = arc < ends[i] - tolerance
+        return after_start and before_end
+
+    def visit(self, strand_id: int, start: float, end: float) -> None:
+        """Marks the strand walked from distance start to distance end, merging the overlapping intervals"""
+
+        starts, ends = self._visited.setdefault(strand_id, ([], []))
+        i = bisect_right(starts, start)
+        if i > 0 and ends[i - 1] >= start:  # overlaps the previous interval
+            i -= 1
+            start = starts[i]
+        j = i
+        while j < len(starts) and starts[j] <= end:
+            end = max(end, ends[j])
+            j += 1
+        starts[i:j] = [start]
+        ends[i:j] = [end]
 
 
 class _Walker:
@@ -25,22 +144,25 @@ class _Walker:
             next: list = None,  # list of Walkers
             current_pos: Point = None,
             target: Point = None,
-            obstacles: list = None,  # list of Points
+            obstacles: list = None,  # list of Points and Polygons
             path: MultiLineString = None,
             step_size: float = 1.0,
             reach_dist: float = 1.0,
-            max_walking_distance: float = 10.0
+            max_walking_distance: float = 10.0,
+            path_index: _PathIndex = None
     ):
         """
         :param previous: Previous Walker to the one being instatiated
         :param next: List of Walker objects that are found after this one
         :param current_pos: shapely Point object, current position of this Walker object
         :param target: shapely Point object, The location where the walker is trying to reach
-        :param obstacles: List of shapely Point objects, obstacles in the path (not implemented yet)
+        :param obstacles: List of shapely Points (blocked ducts) and Polygons (no-go areas), 
+            the path is blocked closer than step_size to them
         :param path: shapely LineString or MultiLineString object, the path the Walker walks
         :param step_size: Distance between a Walker object and its next one(s)
         :param reach_dist: Maximum distance from the target at which the Walker is considered arrived
         :param max_walking_distance: Maximum distance the Walker is able to walk
+        :param path_index: _PathIndex of path shared by the Walkers of the walk, built if not given
         """
 
         # input checks
@@ -60,6 +182,9 @@ class _Walker:
         self.step_size = step_size
         self.reach_dist = reach_dist
         self.max_walking_distance = max_walking_distance
+        if path_index is None:
+            path_index = _PathIndex(path, tolerance=reach_dist * 1e-9, obstacles=self.obstacles, clearance=step_size)
+        self.path_index = path_index
 
         self.l = Logger(log_type='cli')
 
@@ -78,30 +203,6 @@ class _Walker:
             return False
         return p.distance(self.previous.get_pos()) < (self.reach_dist / 100)
 
-    def _remove_redundant_points(self, pos_list: list) -> list:
-        redundant_idx = []
-        for p_idx in range(1, len(pos_list) - 1):
-            p_prev: Point = pos_list[p_idx - 1]
-            p_curr: Point = pos_list[p_idx]
-            p_next: Point = pos_list[p_idx + 1]
-
-            v1 = (p_curr.x - p_prev.x, p_curr.y - p_prev.y)  # p_prev to p_curr
-            v2 = (p_next.x - p_curr.x, p_next.y - p_curr.y)  # p_curr to p_next
-            v2_90 = (v2[1], -1 * v2[0])  # v2 rotated 90 degrees
-
-            scalar_prod = v1[0] * v2_90[0] + v1[1] * v2_90[1]
-
-            # v1 // v2 <=> v1 perp v2 <=> v1 . v2_90 == 0
-            if scalar_prod == 0:
-                redundant_idx.append(p_idx)
-
-        clean_pos_list = []
-        for p_idx, p in enumerate(pos_list):
-            if p_idx not in redundant_idx:
-                clean_pos_list.append(p)
-
-        return clean_pos_list
-
     def _sort_next_steps(self, unsorted_next_steps: list) -> list:
         """
         sort next steps depending on how much the 
@@ -154,24 +255,26 @@ class _Walker:
         circle = self.current_pos.buffer(self.step_size)
         ring = circle.boundary
 
-        # find intersections between path and ring
-        inter = ring.intersection(self.path)
-
-        # search the previous Walker inside intersections and delete it
-        next_steps = []
-        if isinstance(inter, Point):
-            if not self._matches_previous(inter):
-                next_steps = [inter]
-        if isinstance(inter, MultiPoint) or isinstance(inter, GeometryCollection):
-            unsorted_next_steps = []
-            for p in list(inter.geoms):
-                if isinstance(p, Point):
-                    if not self._matches_previous(p):
-                        unsorted_next_steps.append(p)
-            next_steps = self._sort_next_steps(unsorted_next_steps)
-
-        # if there are next steps, the path updates to not include the previous walked sections
-        path = self.path.difference(circle) if next_steps != [] else self.path
+        # find intersections between the ring and the strands near current_pos, 
+        # except the previous Walker and the sections already walked
+        strand_ids = self.path_index.query(self.current_pos, self.step_size)
+        unsorted_next_steps = []
+        for strand_id in strand_ids:
+            strand = self.path_index.get_strand(strand_id)
+            for p in get_parts(ring.intersection(strand)):
+                if isinstance(p, Point) and not self._matches_previous(p) \
+                        and not self.path_index.is_visited(strand_id, strand.project(p)):
+                    unsorted_next_steps.append(p)
+        next_steps = self._sort_next_steps(unsorted_next_steps) if unsorted_next_steps else []
+
+        # if there are next steps, the sections inside the circle are walked
+        if next_steps != []:
+            for strand_id in strand_ids:
+                strand = self.path_index.get_strand(strand_id)
+                for section in get_parts(strand.intersection(circle)):
+                    if isinstance(section, LineString) and not section.is_empty:
+                        arcs = strand.project(Point(section.coords[0])), strand.project(Point(section.coords[-1]))
+                        self.path_index.visit(strand_id, min(arcs), max(arcs))
 
         # return remaining intersections
         return [
@@ -180,10 +283,11 @@ class _Walker:
                 current_pos=ns,
                 target=self.target,
                 obstacles=self.obstacles,
-                path=path,
+                path=self.path,
                 step_size=self.step_size,
                 reach_dist=self.reach_dist,
-                max_walking_distance=self.max_walking_distance - self.step_size
+                max_walking_distance=self.max_walking_distance - self.step_size,
+                path_index=self.path_index
             ) for ns in next_steps
         ]
 
@@ -199,14 +303,14 @@ class _Walker:
     def _base_case_path_blocked(self) -> bool:
         """
         If an obstacle is closer that step_size to the _Walker, 
-        the path is blocked
+        the path is blocked. Only checked at the source: the strands 
+        were cut around the obstacles when path_index was built, so 
+        the next _Walkers are never closer than step_size to them
         """
 
-        # base case: if dist(current_pos, obstacle) < step_size, end here (path blocked)
-        for obstacle in self.obstacles:
-            if self.current_pos.distance(obstacle) <= self.step_size:
-                return True
-            
+        # base case: if dist(current_pos, obstacle) <= step_size, end here (path blocked)
+        return self.path_index.is_blocked(self.current_pos, self.step_size)
+
     def _base_case_max_distance_walked(self) -> bool:
         """
         If max_walking_distance is smaller that step_size, 
@@ -228,79 +332,299 @@ class _Walker:
 
     def _walk(self) -> list:
         """
-        Walks recursively the path
+        Walks recursively the path, the sections walked are shared through path_index
         :return: List containing if target was found (bool), 
-            a list of visited Points, and an updated path
+            and a list of visited Points
         """
+        debug = self.l.level <= DEBUG
+
         if self._base_case_path_found():
-            self._log(green(f"Target found at {self}"))
-            return [True, [self.current_pos], self.path]
+            if debug:
+                self._log(green("Target found at %s"), self)
+            return [True, [self.current_pos]]
 
-        if self._base_case_path_blocked():
-            self._log(red(f"Obstacle found at {self}"))
-            return [False, [], self.path]
+        if self.previous is None and self._base_case_path_blocked():
+            if debug:
+                self._log(red("Obstacle found at %s"), self)
+            return [False, []]
 
         if self._base_case_max_distance_walked():
-            self._log(red(f"Max distance walked at {self}"))
-            return [False, [], self.path]
+            if debug:
+                self._log(red("Max distance walked at %s"), self)
+            return [False, []]
 
         # find next step(s)
         self.next = self._find_next_steps()
 
         if self._base_case_dead_end():
-            self._log(red(f"Dead end at {self}"))
-            return [False, [], self.path]
+            if debug:
+                self._log(red("Dead end at %s"), self)
+            return [False, []]
 
         # self.l.log(light_gray(f"Walking at {self}"))
 
         # call _walk() for every next Walker
-        path = None
         for w in self.next:
-            if path is not None:
-                w.path = path
-
-            [tf, pos_list, path] = w._walk()
+            [tf, pos_list] = w._walk()
 
             if tf:
-                return [True, [self.current_pos] + pos_list, self.path]
+                return [True, [self.current_pos] + pos_list]
 
-        return [False, [], path]
+        return [False, []]
 
     def walk(self) -> LineString:
         """
         Finds the path to the target Point
         :return: List of Points if path found, None otherwise
         """
-        [tf, pos_list, path] = self._walk()
+        [tf, pos_list] = self._walk()
         if tf:
             pos_list.append(self.target)
-            return LineString(self._remove_redundant_points(pos_list))
+            return remove_redundant_points(pos_list)
 
         return None
 
-    def _log(self, log: str) -> None:
-        """Handles the log"""
+    def _log(self, log, *args, level: int = DEBUG) -> None:
+        """Handles the log, see Logger.log"""
         
-        self.l.log(log)
+        self.l.log(log, *args, level=level)
 
     def __str__(self):
         return f"({self.current_pos.x}, {self.current_pos.y})"
 
 
+def _get_arc_lengths(coords: np.ndarray) -> np.ndarray:
+    """Returns the distance walked along coords (n, 2) at every vertex"""
+
+    arc_lengths = np.zeros(len(coords))
+    np.cumsum(np.hypot(*np.diff(coords, axis=0).T), out=arc_lengths[1:])
+    return arc_lengths
+
+
+def _first_within(coords: np.ndarray, arc_lengths: np.ndarray, point: tuple, radius: float) -> float | None:
+    """
+    Returns the distance walked along coords (n, 2) until the first position 
+    closer than radius to point, None if there is no such position. 
+    Solved segment by segment on the vertex arrays (no geometry operations).
+    """
+
+    q = np.asarray(point, dtype=float)
+    if len(coords) == 1:
+        return 0.0 if np.hypot(*(coords[0] - q)) <= radius else None
+
+    p0 = coords[:-1]
+    d = coords[1:] - p0
+    w = q - p0
+    seg_len2 = (d * d).sum(axis=1)
+    t = np.clip((w * d).sum(axis=1) / np.where(seg_len2 > 0, seg_len2, 1), 0, 1)
+    dist2 = ((p0 + t[:, None] * d - q) ** 2).sum(axis=1)  # closest point of every segment
+
+    hits = np.flatnonzero(dist2 <= radius * radius)
+    if hits.size == 0:
+        return None
+
+    i = hits[0]
+    if (w[i] * w[i]).sum() <= radius * radius:  # the segment starts inside
+        return float(arc_lengths[i])
+    # |p0 + t d - q| = radius, entering side
+    t_in = t[i] - ((radius * radius - dist2[i]) / seg_len2[i]) ** 0.5
+    return float(arc_lengths[i] + max(t_in, 0.0) * seg_len2[i] ** 0.5)
+
+
+def _cut(coords: np.ndarray, arc_lengths: np.ndarray, arc: float) -> np.ndarray:
+    """Returns coords walked until distance arc, interpolating the last point"""
+
+    i = int(np.searchsorted(arc_lengths, arc, side='right'))
+    if i >= len(coords):
+        return coords
+    seg_len = arc_lengths[i] - arc_lengths[i - 1]
+    t = (arc - arc_lengths[i - 1]) / seg_len if seg_len > 0 else 0.0
+    return np.vstack([coords[:i], coords[i - 1] + t * (coords[i] - coords[i - 1])])
+
+
+class _LineFollower:
+    """
+    Analytic alternative to _Walker. Walks the vertex arrays of the strands instead 
+    of stepping with buffers: reaching the target, an obstacle or the maximum distance 
+    is solved segment by segment, and it only branches at the junctions of the strands 
+    (_StrandTopology nodes). Depth first with an explicit stack, prioritizing the 
+    strands pointing to the target, every strand is walked once. O(vertices visited).
+    """
+
+    def __init__(
+            self,
+            current_pos: Point = None,
+            target: Point = None,
+            obstacles: list = None,  # list of Points and Polygons
+            path: MultiLineString = None,
+            step_size: float = 1.0,
+            reach_dist: float = 1.0,
+            max_walking_distance: float = 10.0
+    ):
+        """
+        Same parameters as _Walker, step_size is only the distance at which obstacles block the walk 
+        (the strands are cut there when the walk starts)
+        """
+
+        # input checks
+        if not isinstance(current_pos, Point):
+            raise ValueError(f"current_pos: {current_pos} is not a Point object")
+        if not isinstance(target, Point):
+            raise ValueError(f"target: {target} is not a Point object")
+        if not (isinstance(path, MultiLineString) or isinstance(path, LineString)):
+            raise ValueError(f"path: {path} is not a MultiLineString or LineString object")
+
+        self.current_pos = current_pos
+        self.target = target
+        self.obstacles = obstacles if obstacles is not None else []
+        self.path = path
+        self.step_size = step_size
+        self.reach_dist = reach_dist
+        self.max_walking_distance = max_walking_distance
+
+        self.l = Logger(log_type='cli')
+
+    def _get_reach(self, coords: np.ndarray, arc_lengths: np.ndarray, walked: float) -> tuple[str, float]:
+        """
+        Walks coords (from its first point, after walking walked) and returns how it ends: 
+        ('found', arc), ('max', arc) or ('end', arc), arc being the distance walked on coords. 
+        Obstacles are not checked, the strands were cut around them.
+        """
+
+        budget = self.max_walking_distance - walked
+        target_arc = _first_within(coords, arc_lengths, (self.target.x, self.target.y), self.reach_dist)
+
+        if target_arc is not None and target_arc <= budget:
+            return 'found', target_arc
+        if arc_lengths[-1] > budget:
+            return 'max', budget
+        return 'end', float(arc_lengths[-1])
+
+    def _get_alignment(self, start: tuple, second: tuple) -> float:
+        """Cosine between the start-second step and the start-target direction"""
+
+        dx, dy = second[0] - start[0], second[1] - start[1]
+        tx, ty = self.target.x - start[0], self.target.y - start[1]
+        mod = ((dx * dx + dy * dy) * (tx * tx + ty * ty)) ** 0.5
+        return (dx * tx + dy * ty) / mod if mod > 0 else 0.0
+
+    def _sort_pieces(self, pieces: list[tuple[np.ndarray, int]]) -> list[tuple[np.ndarray, int]]:
+        """Sorts (coords, end node) pieces, the one pointing to the target last (top of the stack)"""
+
+        return sorted(pieces, key=lambda piece: self._get_alignment(piece[0][0], piece[0][min(1, len(piece[0]) - 1)]))
+
+    def _sort_strands(self, node: int, incident: list, topology: _StrandTopology) -> list:
+        """Sorts the incident strands of node, the one pointing to the target last (top of the stack)"""
+
+        start = topology.get_node_coords(node)
+
+        def alignment(item: tuple) -> float:
+            strand_id, _, opposite_end = item
+            coords = get_coordinates(topology.get_strand(strand_id))
+            return self._get_alignment(start, coords[-2] if opposite_end == 0 else coords[1])  # first step away from node
+
+        return sorted(incident, key=alignment)
+
+    def walk(self) -> LineString:
+        """
+        Finds the path to the target Point
+        :return: LineString if path found, None otherwise
+        """
+
+        source = (self.current_pos.x, self.current_pos.y)
+        if self.current_pos.distance(self.target) <= self.reach_dist:
+            return remove_redundant_points([self.current_pos, self.target])
+
+        # noded (junctions are strand ends) and cut around the obstacles
+        path_index = _PathIndex(unary_union(self.path), obstacles=self.obstacles, clearance=self.step_size)
+        if path_index.is_blocked(self.current_pos, self.step_size):
+            return None
+        lines = path_index.get_strands()
+        if not lines:
+            return None
+        topology = _StrandTopology(lines=lines, tolerance=self.reach_dist / 100)
+
+        # the source joins its strand at its projection, which splits the strand in 
+        # two pieces, one towards each end
+        source_strand = int(STRtree(lines).query_nearest(self.current_pos)[0])
+        coords = get_coordinates(lines[source_strand])
+        arc_lengths = _get_arc_lengths(coords)
+        source_arc = lines[source_strand].project(self.current_pos)
+        projection = get_coordinates(lines[source_strand].interpolate(source_arc))[0]
+        pieces = [
+            (np.vstack([source, projection, coords[arc_lengths < source_arc][::-1]]), topology.find_node(*coords[0])),
+            (np.vstack([source, projection, coords[arc_lengths > source_arc]]), topology.find_node(*coords[-1]))
+        ]
+
+        visited = bytearray(topology.get_strand_count())
+        visited[source_strand] = 1
+        walked_coords = []  # record -> (coords walked, parent record)
+
+        # stack of (coords to walk, node at their end, distance walked before, parent record)
+        stack = [(piece_coords, node, 0.0, None) for piece_coords, node in self._sort_pieces(pieces)]
+        debug = self.l.level <= DEBUG
+        while stack:
+            coords, node, walked, parent = stack.pop()
+            arc_lengths = _get_arc_lengths(coords)
+            reach, arc = self._get_reach(coords, arc_lengths, walked)
+
+            if reach == 'found':
+                if debug:
+                    self._log(green("Target found after %s"), walked + arc)
+                points = [_cut(coords, arc_lengths, arc)]
+                while parent is not None:
+                    parent_coords, parent = walked_coords[parent]
+                    points.append(parent_coords[:-1])  # the last point starts the next piece
+                points.reverse()  # the source pieces hold the source and its projection, the source stays first
+                return remove_redundant_points(np.vstack(points + [[(self.target.x, self.target.y)]]))
+
+            if reach != 'end':
+                if debug:
+                    self._log(red("Max distance walked after %s"), walked + arc)
+                continue
+
+            walked_coords.append((coords, parent))
+            record = len(walked_coords) - 1
+            incident = [item for item in topology.get_incident_strands(node) if not visited[item[0]]]
+            if debug and not incident:
+                self._log(red("Dead end after %s"), walked + arc)
+            for strand_id, opposite_node, opposite_end in self._sort_strands(node, incident, topology):
+                visited[strand_id] = 1
+                strand_coords = get_coordinates(topology.get_strand(strand_id))
+                if opposite_end == 0:
+                    strand_coords = strand_coords[::-1]
+                stack.append((strand_coords, opposite_node, walked + arc, record))
+
+        return None
+
+    def _log(self, log, *args, level: int = DEBUG) -> None:
+        """Handles the log, see Logger.log"""
+        
+        self.l.log(log, *args, level=level)
+
+
 def path_finder(
         source: Point, 
         target: Point, 
         path: MultiLineString, 
         obstacles: list = None,
         step_size: float = 1,
-        max_walking_distance: float = 100
+        max_walking_distance: float = 100,
+        engine: str = 'walker'
 ):
     """
     Tries to find the path from source point to target point, 
     wandering through the path.
+
+    :param engine: 'walker' steps step_size at a time (_Walker), 
+        'analytic' follows the strands vertex arrays (_LineFollower)
     """
 
-    w = _Walker(
+    if engine not in ('walker', 'analytic'):
+        raise ValueError(f"Unknown engine {engine}, it must be 'walker' or 'analytic'")
+
+    walker_class = _Walker if engine == 'walker' else _LineFollower
+    w = walker_class(
         current_pos=source,
         target=target,
         obstacles=obstacles,
@@ -9,118 +9,252 @@ from shapely.ops import (
     GeometryCollection,
     nearest_points
 )
-from shapely import unary_union
+from shapely import unary_union, get_point, get_coordinates, length, STRtree
 
 from os.path import join
+from math import floor
+from heapq import heappush, heappop
 
 from src.clic import red, green, orange, magenta
-from src.logger import Logger
+from src.logger import Logger, DEBUG, INFO
+from src.simplify import remove_redundant_points
+
+
+class _StrandTopology:
+    """
+    Node/edge topology of the strands. Strand ends closer than tolerance 
+    are snapped to the same node using a hash grid of tolerance-sized cells.
+    """
+
+    def __init__(self, lines: list[LineString], tolerance: float | int = 0.1) -> None:
+        self._lines = lines
+        self._tolerance = tolerance
+        self._cell_size = tolerance if tolerance > 0 else 1.0
+
+        self._cells = {}  # (cell_x, cell_y) -> list of node ids
+        self._node_coords = []  # node id -> (x, y)
+        self._incidence = []  # node id -> list of (strand id, opposite node id, opposite end)
+        self._strand_ends = []  # strand id -> ((x0, y0), (x1, y1))
+        self._strand_nodes = []  # strand id -> (node id of start, node id of end)
+        self._strand_lengths = [float(l) for l in length(lines)] if lines else []
+        self._tree = None  # STRtree of the strands, built when needed
+
+        starts = get_coordinates(get_point(lines, 0)) if lines else []
+        ends = get_coordinates(get_point(lines, -1)) if lines else []
+        for strand_id in range(len(lines)):
+            start = (float(starts[strand_id][0]), float(starts[strand_id][1]))
+            end = (float(ends[strand_id][0]), float(ends[strand_id][1]))
+            start_node = self._get_or_create_node(start)
+            end_node = self._get_or_create_node(end)
+
+            self._strand_ends.append((start, end))
+            self._strand_nodes.append((start_node, end_node))
+            self._incidence[start_node].append((strand_id, end_node, 1))
+            if end_node != start_node:
+                self._incidence[end_node].append((strand_id, start_node, 0))
+
+    def _get_cell(self, x: float, y: float) -> tuple[int, int]:
+        return floor(x / self._cell_size), floor(y / self._cell_size)
+
+    def _get_or_create_node(self, coords: tuple[float, float]) -> int:
+        node = self.find_node(*coords)
+        if node is not None:
+            return node
+
+        node = len(self._node_coords)
+        self._node_coords.append(coords)
+        self._incidence.append([])
+        self._cells.setdefault(self._get_cell(*coords), []).append(node)
+        return node
+
+    def find_node(self, x: float, y: float) -> int | None:
+        """
+        Returns the id of the closest node within tolerance of (x, y). 
+        Returns None if there is no such node.
+        """
+
+        cell_x, cell_y = self._get_cell(x, y)
+        node, node_dist = None, None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for candidate in self._cells.get((cell_x + dx, cell_y + dy), ()):
+                    cx, cy = self._node_coords[candidate]
+                    dist = ((cx - x) ** 2 + (cy - y) ** 2) ** 0.5
+                    if dist <= self._tolerance and (node_dist is None or dist < node_dist):
+                        node, node_dist = candidate, dist
+
+        return node
+
+    def get_incident_strands(self, node: int) -> list[tuple[int, int, int]]:
+        """Returns a list of (strand id, opposite node id, opposite end) of the strands touching node"""
+
+        return self._incidence[node]
+
+    def get_strand(self, strand_id: int) -> LineString:
+        return self._lines[strand_id]
+
+    def get_strand_end(self, strand_id: int, end: int) -> tuple[float, float]:
+        """Returns the coordinates of the strand end (0: first coordinate, 1: last coordinate)"""
+
+        return self._strand_ends[strand_id][end]
+
+    def get_strand_length(self, strand_id: int) -> float:
+        return self._strand_lengths[strand_id]
+
+    def get_node_coords(self, node: int) -> tuple[float, float]:
+        return self._node_coords[node]
+
+    def get_blocked_strands(self, obstacles: list | None) -> bytearray:
+        """
+        Returns a flag by strand id of the strands closer than tolerance to any of the 
+        obstacles (Points, or Polygons for no-go areas), found with an STRtree of the strands
+        """
+
+        blocked = bytearray(self.get_strand_count())
+        if not obstacles or not self._lines:
+            return blocked
+
+        if self._tree is None:
+            self._tree = STRtree(self._lines)
+        _, strand_ids = self._tree.query(obstacles, predicate='dwithin', distance=self._tolerance)
+        for strand_id in strand_ids.tolist():
+            blocked[strand_id] = 1
+
+        return blocked
+
+    def get_node_count(self) -> int:
+        return len(self._node_coords)
+
+    def get_strand_count(self) -> int:
+        return len(self._lines)
+
+
+class _TargetIndex:
+    """Spatial index (STRtree) of the targets, answers which target is within tolerance of a point"""
+
+    def __init__(self, targets: list[Point], tolerance: float | int = 0.1, target_ids: list = None) -> None:
+        """
+        :param target_ids: Ids of the targets (FAT names), the indexes of targets are used if not given
+        """
+
+        self._targets = targets
+        self._tolerance = tolerance
+        self._target_ids = target_ids if target_ids is not None else list(range(len(targets)))
+        self._tree = STRtree(targets)
+
+    def match(self, point: Point) -> int | None:
+        """
+        Returns the index of the first target within tolerance of point. 
+        Returns None if there is no such target.
+        """
+
+        matches = self._tree.query(point, predicate='dwithin', distance=self._tolerance)
+        if len(matches) == 0:
+            return None
+
+        return int(matches.min())
+
+    def get_target(self, target_idx: int) -> Point:
+        return self._targets[target_idx]
+
+    def get_target_id(self, target_idx: int):
+        return self._target_ids[target_idx]
 
 
 class _SegmentWalker:
-    """Walker point over the path"""
+    """
+    Walker point over the path. The walked history is a chain of parent 
+    walkers shared between branches, each link holding the strand id it walked.
+    """
 
     def __init__(
             self, 
-            total_path: list[LineString], 
-            walked_path: list[LineString], 
-            walked_points: list[Point],
+            topology: _StrandTopology, 
+            parent: _SegmentWalker | None,
+            strand_id: int | None,
             current_pos: Point,
-            targets: list[Point],
+            current_node: int | None,
+            target_index: _TargetIndex,
             target_found: bool = False,
             tolerance: float | int = 0.1,
-            forbidden_path: list[LineString] = []
+            visited: bytearray = None
     ) -> None:
-        self._total_path = total_path
-        self._walked_path = walked_path
-        self._walked_points = walked_points
+        """
+        :param parent: Walker this one comes from, None for the source walker
+        :param strand_id: Id of the strand walked from parent to current_pos, None for the source walker
+        :param visited: Flag by strand id, shared by all the walkers, of the strands already walked
+        """
+
+        self._topology = topology
+        self._parent = parent
+        self._strand_id = strand_id
+        self._depth = 0 if parent is None else parent._depth + 1
         self._current_pos = current_pos
-        self._targets = targets
+        self._current_node = current_node
+        self._target_index = target_index
+        self._target_idx = None
         self._target_found = target_found
         self._tolerance = tolerance
-        self._forbidden_path = forbidden_path
+        self._visited = visited if visited is not None else bytearray(topology.get_strand_count())
 
     def get_target_found(self) -> bool:
         return self._target_found
 
-    def get_walked_path(self) -> list:
-        return self._walked_path
-    
-    def get_walked_points(self) -> list:
-        return self._walked_points
-
-    def set_forbidden_path(self, forbidden_path: list[LineString]) -> None:
-        self._forbidden_path = forbidden_path
+    def get_target_id(self):
+        """Returns the id of the target found, None if no target was found"""
 
-    def _remove_redundant_points(self, points: list[Point]) -> list[Point]:
-        redundant_idx = []
-        for p_idx in range(1, len(points) - 1):
-            p_prev: Point = points[p_idx - 1]
-            p_curr: Point = points[p_idx]
-            p_next: Point = points[p_idx + 1]
+        if self._target_idx is None:
+            return None
+        return self._target_index.get_target_id(self._target_idx)
 
-            v1 = (p_curr.x - p_prev.x, p_curr.y - p_prev.y)  # p_prev to p_curr
-            v2 = (p_next.x - p_curr.x, p_next.y - p_curr.y)  # p_curr to p_next
-            v2_90 = (v2[1], -1 * v2[0])  # v2 rotated 90 degrees
+    def get_walked_path(self) -> list[int]:
+        """Returns the ids of the walked strands, from the source to the current position"""
 
-            m1 = ((v1[0] ** 2) + (v1[1] ** 2)) ** 0.5
-            m2 = ((v2[0] ** 2) + (v2[1] ** 2)) ** 0.5
+        walked_path = []
+        walker = self
+        while walker._parent is not None:
+            walked_path.append(walker._strand_id)
+            walker = walker._parent
+        walked_path.reverse()
 
-            versor1 = (v1[0] / m1, v1[1] / m1)
-            versor2_90 = (v2_90[0] / m2, v2_90[1] / m2)
-
-            scalar_prod = versor1[0] * versor2_90[0] + versor1[1] * versor2_90[1]
+        return walked_path
+    
+    def get_walked_points(self) -> list[Point]:
+        """Returns the walked points, from the source to the target if it was found"""
 
-            # v1 // v2 <=> v1 perp v2_90 <=> v1 . v2_90 == 0
-            if abs(scalar_prod) < 0.01:
-                redundant_idx.append(p_idx)
+        walked_points = []
+        walker = self._parent
+        while walker is not None:
+            walked_points.append(walker._current_pos)
+            walker = walker._parent
+        walked_points.reverse()
 
-        clean_points = []
-        for p_idx, p in enumerate(points):
-            if p_idx not in redundant_idx:
-                clean_points.append(p)
+        if self._target_idx is not None:
+            target = self._target_index.get_target(self._target_idx)
+            if target not in walked_points:
+                walked_points.append(target)
 
-        return clean_points
+        return walked_points
 
     def get_clean_path(self) -> LineString:
-        return LineString(
-            self._remove_redundant_points(
-                points=self.get_walked_points()
-            )
+        return remove_redundant_points(
+            points=self.get_walked_points(),
+            tolerance=0.01,
+            normalized=True
         )
 
-    def _get_opposite_end(self, line: LineString) -> Point | None:
-        """
-        If self._current_pos matches an end of the parameter line, 
-        returns the other end. Returns None otherwise.
-        """
-
-        if self._current_pos.distance(Point(line.coords[0])) <= self._tolerance:
-            return Point(line.coords[-1])
-        
-        if self._current_pos.distance(Point(line.coords[-1])) <= self._tolerance:
-            return Point(line.coords[0])
-        
-        return None
-
     def _check_target_found(self) -> None:
         """
         Checks if the current position matches a target and 
         updates self.target_found
         """
 
-        for target in self._targets:
-            if self._current_pos.distance(target) <= self._tolerance:
-                if target not in self._walked_points:
-                    self._walked_points.append(target)
-                self._target_found = True
-                return
-            
-        self._target_found = False
+        self._target_idx = self._target_index.match(self._current_pos)
+        self._target_found = self._target_idx is not None
         
     def get_next_walkers(self) -> list:
         """
-        Returns a list of the next walkers with the accumulated walked path.
+        Returns a list of the next walkers, each one linked to this one.
         If the path can continue, the list contains 1 or more walkers.
         If a target was found, the returned list contains the current walker.
         If there is no next walkers (dead end), an empty list is returned.
@@ -131,22 +265,26 @@ class _SegmentWalker:
         if self._target_found:
             return [self]
 
+        if self._current_node is None:  # source out of the path
+            return []
+
         next_walkers = []
-        for line in self._total_path:
-            if line not in self._walked_path + self._forbidden_path:
-                opposite_end = self._get_opposite_end(line)
-                if opposite_end is not None:
-                    next_walkers.append(
-                        _SegmentWalker(
-                            total_path=self._total_path,
-                            walked_path=self._walked_path + [line],
-                            walked_points=self._walked_points + [self._current_pos],
-                            current_pos=opposite_end,
-                            targets=self._targets,
-                            target_found=False,
-                            tolerance=self._tolerance
-                        )
+        for strand_id, opposite_node, opposite_end in self._topology.get_incident_strands(self._current_node):
+            if not self._visited[strand_id]:  # so no strand is walked more than once
+                self._visited[strand_id] = 1
+                next_walkers.append(
+                    _SegmentWalker(
+                        topology=self._topology,
+                        parent=self,
+                        strand_id=strand_id,
+                        current_pos=Point(self._topology.get_strand_end(strand_id, opposite_end)),
+                        current_node=opposite_node,
+                        target_index=self._target_index,
+                        target_found=False,
+                        tolerance=self._tolerance,
+                        visited=self._visited
                     )
+                )
         
         return next_walkers
     
@@ -155,9 +293,9 @@ class _SegmentWalker:
         y = round(self._current_pos.y, 5)
 
         if self.get_target_found():
-            return green(f"SW({x}, {y}, wpl={len(self._walked_path)})")
+            return green(f"SW({x}, {y}, wpl={self._depth})")
         
-        return magenta(f"SW({x}, {y}, wpl={len(self._walked_path)})")
+        return magenta(f"SW({x}, {y}, wpl={self._depth})")
     
 class _Walk:
     """Walk manager"""
@@ -167,19 +305,33 @@ class _Walk:
             source: Point,
             path: list[LineString],
             targets: list[Point],
-            tolerance: float | int = 0.1
+            tolerance: float | int = 0.1,
+            topology: _StrandTopology = None,
+            target_ids: list = None,
+            obstacles: list = None
     ) -> None:
+        """
+        :param topology: Prebuilt _StrandTopology of path, it is built if not given
+        :param target_ids: Ids of the targets (FAT names), the indexes of targets are used if not given
+        :param obstacles: Points (blocked ducts) and Polygons (no-go areas), 
+            the strands closer than tolerance to them are never walked
+        """
+
         self._source = source
         self._path = path
         self._targets = targets
         self._tolerance = tolerance
+        self._topology = topology
+        self._target_ids = target_ids
+        self._obstacles = obstacles
+        self._found_target_ids = []
 
         self.l = Logger(log_type='cli')
 
-    def _log(self, log: str) -> None:
-        """Handles the log"""
+    def _log(self, log, *args, level: int = DEBUG) -> None:
+        """Handles the log, see Logger.log"""
         
-        self.l.log(log)
+        self.l.log(log, *args, level=level)
 
     def _path_can_be_walked(self, walkers: list[_SegmentWalker]) -> bool:
         """Returns True if there are walkers which have not reached a target."""
@@ -191,7 +343,7 @@ class _Walk:
         return False
 
     def _report_walkers(self, walkers: list[_SegmentWalker], iteration: int) -> None:
-        self._log(f"Iteration: {iteration}")
+        self._log("Iteration: %s", iteration)
         for walker in walkers:
             self._log(walker)
         self._log(' ')
@@ -199,22 +351,32 @@ class _Walk:
     def walk(self) -> list[LineString]:
         """Manages _SegmentWalker(s) to find all posible paths to targets"""
 
+        if self._topology is None:
+            self._topology = _StrandTopology(lines=self._path, tolerance=self._tolerance)
+        topology = self._topology
+        target_index = _TargetIndex(targets=self._targets, tolerance=self._tolerance, target_ids=self._target_ids)
+
         walkers = [
             _SegmentWalker(  # source walker
-                total_path=self._path,
-                walked_path=[],
-                walked_points=[],
+                topology=topology,
+                parent=None,
+                strand_id=None,
                 current_pos=self._source,
-                targets=self._targets,
+                current_node=topology.find_node(self._source.x, self._source.y),
+                target_index=target_index,
                 target_found=False,
-                tolerance=self._tolerance
+                tolerance=self._tolerance,
+                visited=topology.get_blocked_strands(self._obstacles)  # blocked strands count as walked
             )
         ]
 
+        debug = self.l.level <= DEBUG
+
         iteration = 0
         while self._path_can_be_walked(walkers):
             iteration += 1
-            self._report_walkers(walkers, iteration)
+            if debug:
+                self._report_walkers(walkers, iteration)
 
             # find next walkers
             old_walkers = [walker for walker in walkers]
@@ -222,35 +384,173 @@ class _Walk:
             for old_walker in old_walkers:
                 walkers += old_walker.get_next_walkers()
 
-            # share walked path so no path is walked more than once
-            forbidden_path = []
-            for walker in walkers:
-                walker: _SegmentWalker
-                forbidden_path += walker.get_walked_path()
-            for walker in walkers:
-                walker.set_forbidden_path(forbidden_path)
-
-        self._report_walkers(walkers, -1)
+        if debug:
+            self._report_walkers(walkers, -1)
 
+        self._found_target_ids = [walker.get_target_id() for walker in walkers]
         return [walker.get_clean_path() for walker in walkers]
 
+    def get_found_target_ids(self) -> list:
+        """Returns the ids of the targets reached by the paths of the last walk, in the same order"""
+
+        return self._found_target_ids
+
+
+class _ShortestPathsWalk:
+    """
+    Shortest paths manager. Builds the _StrandTopology once and runs Dijkstra 
+    from every source, each source taking all the others as targets.
+    """
+
+    def __init__(
+            self,
+            sources: list[Point],
+            path: list[LineString],
+            tolerance: float | int = 0.1,
+            topology: _StrandTopology = None,
+            obstacles: list = None
+    ) -> None:
+        """
+        :param topology: Prebuilt _StrandTopology of path, it is built if not given
+        :param obstacles: Points (blocked ducts) and Polygons (no-go areas), 
+            the strands closer than tolerance to them are never walked
+        """
+
+        self._sources = sources
+        self._path = path
+        self._tolerance = tolerance
+        self._topology = topology
+        self._obstacles = obstacles
+        self._source_nodes = None
+        self._blocked = None
+
+        self.l = Logger(log_type='cli')
+
+    def _log(self, log, *args, level: int = DEBUG) -> None:
+        """Handles the log, see Logger.log"""
+        
+        self.l.log(log, *args, level=level)
+
+    def _prepare(self) -> None:
+        """Builds the topology (if not given), snaps the sources to its nodes and finds the blocked strands, only once"""
+
+        if self._topology is None:
+            self._topology = _StrandTopology(lines=self._path, tolerance=self._tolerance)
+        if self._source_nodes is None:
+            self._source_nodes = [self._topology.find_node(s.x, s.y) for s in self._sources]
+        if self._blocked is None:
+            self._blocked = self._topology.get_blocked_strands(self._obstacles)
+
+    def walk_from(self, source_idx: int) -> list[LineString]:
+        """Finds the shortest paths from a source to every target reachable without crossing another target"""
+
+        self._prepare()
+        source_nodes = self._source_nodes
+        source_node = source_nodes[source_idx]
+        if source_node is None:  # source out of the path
+            return []
+
+        target_nodes = {}  # node -> index of the first target snapped to it
+        for t_idx, t_node in enumerate(source_nodes):
+            if t_idx != source_idx and t_node is not None and t_node != source_node:
+                target_nodes.setdefault(t_node, t_idx)
+
+        dist = {source_node: 0.0}
+        parents = {source_node: (None, None, None)}  # node -> (strand id, previous node, arrival end)
+        done = set()
+        heap = [(0.0, source_node)]
+        paths = []
+
+        while heap:
+            d, node = heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+
+            if node in target_nodes:  # targets end the walk
+                paths.append(self._build_path(source_idx, target_nodes[node], node, parents))
+                continue
+
+            for strand_id, opposite_node, opposite_end in self._topology.get_incident_strands(node):
+                if self._blocked[strand_id]:
+                    continue
+                nd = d + self._topology.get_strand_length(strand_id)
+                if opposite_node not in done and nd < dist.get(opposite_node, nd + 1):
+                    dist[opposite_node] = nd
+                    parents[opposite_node] = (strand_id, node, opposite_end)
+                    heappush(heap, (nd, opposite_node))
+
+        return paths
+
+    def _build_path(self, source_idx: int, target_idx: int, target_node: int, parents: dict) -> LineString:
+        """Builds the path LineString with the same points path_finder returns"""
+
+        points = [self._sources[target_idx]]
+        node = parents[target_node][1]  # the last strand arrives at the target
+        strand_id, previous_node, arrival_end = parents[node]
+        while strand_id is not None:
+            points.append(Point(self._topology.get_strand_end(strand_id, arrival_end)))
+            strand_id, previous_node, arrival_end = parents[previous_node]
+        points.append(self._sources[source_idx])
+        points.reverse()
+
+        return remove_redundant_points(points=points, tolerance=0.01, normalized=True)
+
+    def walk(self) -> list[LineString]:
+        """Finds the paths between all sources"""
+
+        paths = []
+        for source_idx in range(len(self._sources)):
+            self._log("Shortest paths from source %s / %s", source_idx + 1, len(self._sources), level=INFO)
+            paths += self.walk_from(source_idx)
+
+        return paths
+
 
 def path_finder(
         source: Point,
         path: list[LineString],
         targets: list[Point],
-        tolerance: float | int = 0.1   
+        tolerance: float | int = 0.1,
+        obstacles: list = None
 ) -> list[LineString]:
     """
     Tries to find the path from source point to target point, 
     wandering through the path.
+
+    :param obstacles: Points (blocked ducts) and Polygons (no-go areas) the paths can't go through
     """
 
     w = _Walk(
         source=source,
         path=path,
         targets=targets,
-        tolerance=tolerance
+        tolerance=tolerance,
+        obstacles=obstacles
+    )
+
+    return w.walk()
+
+
+def all_paths_finder(
+        sources: list[Point],
+        path: list[LineString],
+        tolerance: float | int = 0.1,
+        obstacles: list = None
+) -> list[LineString]:
+    """
+    Finds the shortest path from every source to each of the other sources 
+    reachable without crossing another one, wandering through the path.
+    Returns the same LineStrings path_finder returns for each source.
+
+    :param obstacles: Points (blocked ducts) and Polygons (no-go areas) the paths can't go through
+    """
+
+    w = _ShortestPathsWalk(
+        sources=sources,
+        path=path,
+        tolerance=tolerance,
+        obstacles=obstacles
     )
 
     return w.walk()
@@ -15,7 +15,7 @@ from os.path import join
 
 from src.clic import red, green, orange, magenta
 from src.fat_graph import FATGraph
-from src.path_finder2 import path_finder
+from src.path_finder2 import _Walk, _StrandTopology
 
 
 class PathFinderThread:  # (QThread):
@@ -27,13 +27,20 @@ class PathFinderThread:  # (QThread):
             source_fat_id_col: str,
             source_fat_idx: int,
             path: list[LineString],
-            tolerance: float | int = 0.1
+            tolerance: float | int = 0.1,
+            topology: _StrandTopology = None
     ) -> None:
+        """
+        :param topology: Prebuilt _StrandTopology of path, shared by the threads of all the FATs
+        """
+
         self._source_fat_gdf = source_fat_gdf
         self._source_fat_id_col = source_fat_id_col    
         self._source_fat_idx = source_fat_idx
         self._path = path
         self._tolerance = tolerance
+        self._topology = topology
+        self._found_target_ids = []
 
     def run(self) -> list[LineString]:
         return self.find_paths()
@@ -43,11 +50,22 @@ class PathFinderThread:  # (QThread):
         print(f"\tfinding paths from {s_name} ( {self._source_fat_idx + 1} / {self._source_fat_gdf.index.size} \
               \t|\t{(self._source_fat_idx + 1) * 100 / self._source_fat_gdf.index.size} % )")
         source = self._source_fat_gdf.loc[self._source_fat_idx, 'geometry']
-        targets = list(self._source_fat_gdf[self._source_fat_gdf[self._source_fat_id_col] != s_name]['geometry'])
+        targets_gdf = self._source_fat_gdf[self._source_fat_gdf[self._source_fat_id_col] != s_name]
         
-        return path_finder(
+        w = _Walk(
             source=source,
             path=self._path,
-            targets=targets,
-            tolerance=self._tolerance
+            targets=list(targets_gdf['geometry']),
+            tolerance=self._tolerance,
+            topology=self._topology,
+            target_ids=list(targets_gdf[self._source_fat_id_col])
         )
+        paths = w.walk()
+        self._found_target_ids = w.get_found_target_ids()
+
+        return paths
+
+    def get_found_target_ids(self) -> list:
+        """Returns the names of the FATs reached by the paths found, in the same order"""
+
+        return self._found_target_ids
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import geopandas as gpd
+from shapely.ops import (
+    Point,
+    LineString
+)
+
+from os import remove
+from os.path import isfile
+
+from src.clic import red, green, orange
+
+
+class PathsWriter:
+    """
+    Streams the paths found from each FAT to a GeoPackage, appending only the new 
+    paths of every FAT and recording which FATs are done, so a stopped run can be resumed.
+    """
+
+    PATHS_LAYER = 'paths'
+    DONE_FATS_LAYER = 'done_fats'
+    SOURCE_COL = 'source'
+
+    def __init__(self, file_path: str, crs=4326, resume: bool = False) -> None:
+        """
+        :param file_path: Path of the GeoPackage (.gpkg)
+        :param crs: CRS of the paths
+        :param resume: If True, the paths already in the GeoPackage are kept and their FATs 
+            are reported as done. If False, the GeoPackage is started from scratch
+        """
+
+        self._file_path = file_path
+        self._crs = crs
+        self._done_fats = set()
+
+        if isfile(file_path):
+            if resume:
+                self._load_done_fats()
+            else:
+                remove(file_path)
+
+    def _get_layers(self) -> list[str]:
+        if not isfile(self._file_path):
+            return []
+        return list(gpd.list_layers(self._file_path)['name'])
+
+    def _load_done_fats(self) -> None:
+        """Reads the done FATs and drops the paths of a FAT that was interrupted while being written"""
+
+        layers = self._get_layers()
+        if self.DONE_FATS_LAYER in layers:
+            done_gdf = gpd.read_file(self._file_path, layer=self.DONE_FATS_LAYER)
+            self._done_fats = set(done_gdf[self.SOURCE_COL])
+
+        if self.PATHS_LAYER in layers:
+            paths_gdf = gpd.read_file(self._file_path, layer=self.PATHS_LAYER)
+            unfinished = ~paths_gdf[self.SOURCE_COL].isin(self._done_fats)
+            if unfinished.any():
+                print(orange(f"\tdropping {int(unfinished.sum())} paths of unfinished FATs"))
+                paths_gdf[~unfinished].to_file(self._file_path, layer=self.PATHS_LAYER, driver='GPKG', mode='w')
+
+    def get_done_fats(self) -> set:
+        """Returns the ids of the FATs whose paths are already written"""
+
+        return self._done_fats
+
+    def append(self, source_fat, source_geom: Point, paths: list[LineString]) -> None:
+        """
+        Appends the paths found from a FAT and marks the FAT as done
+
+        :param source_fat: Id (name) of the FAT the paths were found from
+        :param source_geom: Geometry of the FAT
+        :param paths: Paths found from the FAT
+        """
+
+        mode = 'a' if isfile(self._file_path) else 'w'
+        if paths:
+            paths_gdf = gpd.GeoDataFrame(
+                {self.SOURCE_COL: [source_fat for _ in paths]}, 
+                geometry=paths, 
+                crs=self._crs
+            )
+            paths_gdf.to_file(self._file_path, layer=self.PATHS_LAYER, driver='GPKG', mode=mode)
+            mode = 'a'
+
+        # written after the paths, a FAT is only done when all its paths are in the file
+        done_gdf = gpd.GeoDataFrame({self.SOURCE_COL: [source_fat]}, geometry=[source_geom], crs=self._crs)
+        done_gdf.to_file(self._file_path, layer=self.DONE_FATS_LAYER, driver='GPKG', mode=mode)
+        self._done_fats.add(source_fat)
+
+    def read(self) -> gpd.GeoDataFrame:
+        """
+        Returns all the paths written, with the FAT each one was found from. 
+        Raises FileNotFoundError if the GeoPackage doesn't exist (nothing was ever written)
+        """
+
+        if not isfile(self._file_path):
+            raise FileNotFoundError(f"{self._file_path} doesn't exist, no paths were written")
+
+        if self.PATHS_LAYER not in self._get_layers():  # no FAT had paths
+            return gpd.GeoDataFrame({self.SOURCE_COL: []}, geometry=gpd.GeoSeries([], crs=self._crs))
+
+        return gpd.read_file(self._file_path, layer=self.PATHS_LAYER)
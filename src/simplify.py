@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+from shapely.ops import (
+    Point,
+    LineString
+)
+from shapely import get_coordinates
+
+
+def remove_redundant_points(
+        points: list[Point] | np.ndarray, 
+        tolerance: float = 0.0, 
+        normalized: bool = False
+) -> LineString:
+    """
+    Removes the points that are aligned with their previous and next ones and 
+    returns the clean LineString. Works on the whole coordinates array at once.
+
+    :param points: List of shapely Points or (n, 2) array of coordinates
+    :param tolerance: A point is redundant if the cross product of the segments before 
+        and after it is smaller than tolerance (in absolute value), or exactly 0
+    :param normalized: If True, the cross product is computed over the segments versors 
+        (sine of the angle between them), so tolerance doesn't depend on the segments lengths
+    """
+
+    coords = np.asarray(points, dtype=float) if isinstance(points, np.ndarray) else get_coordinates(points)
+
+    if len(coords) < 3:
+        return LineString(coords)
+
+    v1 = coords[1:-1] - coords[:-2]  # p_prev to p_curr
+    v2 = coords[2:] - coords[1:-1]  # p_curr to p_next
+
+    # v1 // v2 <=> v1 perp v2 rotated 90 degrees <=> v1 x v2 == 0
+    cross_prod = v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0]
+    if normalized:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross_prod = cross_prod / (np.hypot(v1[:, 0], v1[:, 1]) * np.hypot(v2[:, 0], v2[:, 1]))
+
+    keep = np.ones(len(coords), dtype=bool)
+    keep[1:-1] = ~((np.abs(cross_prod) < tolerance) | (cross_prod == 0))  # zero length segments (nan) are kept
+
+    return LineString(coords[keep])
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import numpy as np
+from shapely.ops import (
+    Point,
+    LineString
+)
+from shapely import STRtree, get_point, get_coordinates
+
+
+def get_line_ends(lines: list[LineString]) -> np.ndarray:
+    """Returns an array with the distinct ends (Points) of the lines, in order of appearance"""
+
+    ends = np.concatenate([get_point(lines, 0), get_point(lines, -1)])
+    ends = ends.reshape(2, -1).T.ravel()  # line 0 start, line 0 end, line 1 start, ...
+
+    # exact coordinates dedup, keeping the first appearance of each end
+    _, first_idx = np.unique(get_coordinates(ends), axis=0, return_index=True)
+    return ends[np.sort(first_idx)]
+
+
+def snap_to_line_ends(geoms: list[Point] | np.ndarray, lines: list[LineString]) -> np.ndarray:
+    """
+    Snaps every geometry to its nearest line end, with a single bulk STRtree query.
+
+    :return: Array with the snapped Points, in the same order as geoms
+    """
+
+    geoms = np.asarray(geoms, dtype=object)
+    ends = get_line_ends(lines)
+
+    tree = STRtree(ends)
+    geom_idx, end_idx = tree.query_nearest(geoms, all_matches=False)
+
+    snapped = geoms.copy()
+    snapped[geom_idx] = ends[end_idx]
+    return snapped
@@ -0,0 +1,77 @@
+import numpy as np
+import geopandas as gpd
+from shapely.ops import (
+    Point,
+    LineString
+)
+
+from src.fat_graph import FATGraph
+from src.fat_graph_constructor_thread import FATGraphConstructorThread
+from src.clic import red, green, orange
+
+
+def _create_fat_graph_quadratic(fats_gdf: gpd.GeoDataFrame, fats_id_column: str,
+                                all_paths_gdf: gpd.GeoDataFrame, tolerance: float, storage: str) -> FATGraph:
+    """Path by path, FAT by FAT matching the STRtree one replaced"""
+
+    fat_graph = FATGraph(fats=list(fats_gdf[fats_id_column]), storage=storage)
+    for path in all_paths_gdf.geometry:
+        for ends in ((0, -1), (-1, 0)):
+            for i in range(fats_gdf.index.size):
+                fat1 = fats_gdf.loc[i, fats_id_column]
+                if Point(path.coords[ends[0]]).distance(fats_gdf.loc[i, 'geometry']) >= tolerance:
+                    continue
+                for j in range(fats_gdf.index.size):
+                    fat2 = fats_gdf.loc[j, fats_id_column]
+                    if j != i and Point(path.coords[ends[1]]).distance(fats_gdf.loc[j, 'geometry']) < tolerance:
+                        data = fat_graph.get_edge_data(fat1, fat2)
+                        if data is None or data['weight'] > path.length:
+                            fat_graph.insert_edge((fat1, fat2, {'weight': path.length, 'linestring': path}))
+
+    return fat_graph
+
+
+def _test1():
+    rng = np.random.default_rng(0)
+    tolerance = 0.1
+
+    # some FATs share their name, some are closer than tolerance to each other
+    xy = rng.uniform(0, 10, size=(30, 2))
+    xy[25:] = xy[:5] + rng.uniform(-0.05, 0.05, size=(5, 2))
+    fats_gdf = gpd.GeoDataFrame(
+        {'Numero_NAP': [f'f{i % 24}' for i in range(30)]},
+        geometry=[Point(p) for p in xy],
+        crs=4326
+    )
+
+    # several paths of different lengths between the same FATs, some ends far from every FAT
+    paths = []
+    for _ in range(300):
+        i, j = rng.integers(0, 30, size=2)
+        start = xy[i] + rng.uniform(-0.06, 0.06, size=2)
+        end = xy[j] + rng.uniform(-0.06, 0.06, size=2) if rng.random() < 0.9 else rng.uniform(0, 10, size=2)
+        middle = (start + end) / 2 + rng.uniform(-1, 1, size=2)
+        paths.append(LineString([start, middle, end]))
+    all_paths_gdf = gpd.GeoDataFrame(geometry=paths, crs=4326)
+
+    for storage in ('dense', 'sparse'):
+        expected = _create_fat_graph_quadratic(fats_gdf, 'Numero_NAP', all_paths_gdf, tolerance, storage)
+        fat_graph = FATGraphConstructorThread(
+            fats_gdf=fats_gdf,
+            fats_id_column='Numero_NAP',
+            all_paths_gdf=all_paths_gdf,
+            tolerance=tolerance,
+            storage=storage
+        ).run()
+        assert str(fat_graph) == str(expected)
+
+    print(green("_test1 executed successfully"))
+
+
+def _tests():
+    _test1()
+
+
+if __name__ == '__main__':
+    print(orange("fat_graph_constructor_thread_tests.py executed directly\n"))
+    _tests()
@@ -1,3 +1,4 @@
+import numpy as np
 import geopandas as gpd
 from shapely.ops import (
     Point,
@@ -10,12 +11,67 @@ from shapely.ops import (
 from shapely import unary_union
 
 from os.path import join
+from tempfile import TemporaryDirectory
 
 from src.env import SHP_PATH
 from src.fat_graph import FATGraph
+from src.fat_graph_grouper_thread import FATGraphGrouperThread
 from src.clic import red, green, orange
 
 
+def _random_fat_graph_input(seed: int, n_fats: int = 40, n_edges: int = 80) -> tuple[list, list]:
+    """FATs and edges of a random graph, with integer weights so that there are ties"""
+
+    rng = np.random.default_rng(seed)
+    fats = [f'f{i}' for i in range(n_fats)]
+    edges = {}
+    for _ in range(n_edges):
+        a, b = rng.choice(n_fats, size=2, replace=False)
+        edges[(fats[a], fats[b])] = {'weight': int(rng.integers(1, 10)), 'linestring': f'{fats[a]}-{fats[b]}'}
+
+    return fats, [(a, b, data) for (a, b), data in edges.items()]
+
+def _group_by_n_scan(fats: list, edges: list, n: int) -> list:
+    """Greedy grouping scanning the whole adjacency matrix at every step, as group_by_n did before its heaps"""
+
+    adj_mat = [[None for _ in fats] for _ in fats]
+    for fat_1, fat_2, data in edges:
+        adj_mat[fats.index(fat_1)][fats.index(fat_2)] = data
+        adj_mat[fats.index(fat_2)][fats.index(fat_1)] = data
+
+    groups = []
+    ignore_fats = []
+    while len(ignore_fats) < len(fats):
+        # most disconnected FAT, the highest total weight on ties
+        start, start_degree, start_weight = '', len(fats) + 1, 0
+        for row_idx, fat_row in enumerate(fats):
+            if fat_row in ignore_fats:
+                continue
+            row = [data['weight'] for col_idx, data in enumerate(adj_mat[row_idx]) if data is not None and fats[col_idx] not in ignore_fats]
+            if len(row) < start_degree or (len(row) == start_degree and sum(row) > start_weight):
+                start, start_degree, start_weight = fat_row, len(row), sum(row)
+
+        # lightest edge leaving the group, until n FATs
+        fats_in_group, edges_in_group = [start], []
+        while len(fats_in_group) < n:
+            best = None
+            for fat_row in fats_in_group:
+                row_idx = fats.index(fat_row)
+                for col_idx, data in enumerate(adj_mat[row_idx]):
+                    if data is None or fats[col_idx] in ignore_fats + fats_in_group:
+                        continue
+                    if best is None or data['weight'] < best[2]['weight']:
+                        best = (row_idx, col_idx, data)
+            if best is None:
+                break
+            fats_in_group.append(fats[best[1]])
+            edges_in_group.append(best[2]['linestring'])
+
+        groups.append((fats_in_group, edges_in_group))
+        ignore_fats += fats_in_group
+
+    return groups
+
 def _test1():
     fatg = FATGraph(
         fats=['f1', 'f2', 'f3', 'f4', 'f5'],
@@ -163,6 +219,227 @@ def _test5():
 
     print(green("_test5 executed successfully"))
 
+def _test6():
+    fats = ['f1', 'f2', 'f3', 'f4', 'f5']
+    edges = [
+        ('f1', 'f2', {'weight': 3}),
+        ('f1', 'f4', {'weight': 2}),
+        ('f1', 'f5', {'weight': 1}),
+        ('f2', 'f3', {'weight': 6}),
+        ('f2', 'f4', {'weight': 1}),
+        ('f2', 'f5', {'weight': 2}),
+        ('f3', 'f4', {'weight': 1}),
+        ('f4', 'f5', {'weight': 8})
+    ]
+
+    dense = FATGraph(fats=fats, edges=edges, storage='dense')
+    sparse = FATGraph(fats=fats, edges=edges, storage='sparse')
+
+    assert sparse.get_edge_data('f1', 'f3') is None
+    assert sparse.get_edge_data('f5', 'f4') == {'weight': 8}
+    assert str(dense) == str(sparse)
+    for fat_idx in range(len(fats)):
+        assert dense._adjacency.neighbours(fat_idx) == sparse._adjacency.neighbours(fat_idx)
+    assert dense._adjacency.neighbour_idxs[2] == {1, 3}  # the dense rows are not scanned
+    assert dense.group_by_n(3, 'weight', 'weight') == sparse.group_by_n(3, 'weight', 'weight')
+
+    print(green("_test6 executed successfully"))
+
+def _test7():
+    fatg = FATGraph(
+        fats=['f1', 'f2', 'f3', 'f4', 'f5'],
+        edges=[
+            ('f1', 'f2', {'weight': 3, 'linestring': LineString([(0, 0), (3, 0)])}),
+            ('f2', 'f4', {'weight': 6, 'linestring': LineString([(3, 0), (3, 6)])}),
+            ('f3', 'f5', {'weight': 1, 'linestring': LineString([(9, 0), (10, 0)])}),
+        ],
+        storage='sparse'
+    )
+
+    edge_table = fatg.to_edge_table()
+    print(edge_table)
+    assert edge_table.get_edge_count() == 3
+    assert list(edge_table.indptr) == [0, 1, 3, 4, 5, 6]
+    assert list(edge_table.rows) == [0, 1, 1, 2, 3, 4]
+    assert list(edge_table.cols) == [1, 0, 3, 4, 1, 2]
+    assert list(edge_table.weights['weight']) == [3, 3, 6, 1, 6, 1]
+    assert edge_table.get_entry_data(2)['linestring'] is fatg.get_edge_data('f2', 'f4')['linestring']
+
+    fatg2 = FATGraph.from_edge_table(edge_table)
+    assert fatg2.get_edge_data('f5', 'f3')['weight'] == 1
+
+    try:
+        from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+    except ImportError:
+        print(orange("\tscipy not installed, to_csr not tested"))
+    else:
+        csr = edge_table.to_csr('weight')
+        assert np.shares_memory(csr.data, edge_table.weights['weight'])  # no copy
+        n_components, _ = connected_components(csr, directed=False)
+        assert n_components == 2
+
+        # zero weights stay edges for csgraph
+        zero_table = FATGraph(
+            fats=['f1', 'f2', 'f3'],
+            edges=[('f1', 'f2', {'weight': 0}), ('f2', 'f3', {'weight': 2}), ('f1', 'f3', {'weight': 5})],
+            storage='sparse'
+        ).to_edge_table()
+        mst = minimum_spanning_tree(zero_table.to_csr('weight'))
+        assert mst.nnz == 2 and mst.sum() == 2
+        assert list(zero_table.weights['weight']) == [0, 5, 0, 2, 5, 2]  # the table is not changed
+
+    print(green("_test7 executed successfully"))
+
+def _test8():
+
+    # two chains of 5 FATs, f1..f5 and f6..f10, plus an isolated f11
+    fats = [f'f{i}' for i in range(1, 12)]
+    edges = []
+    for start in (1, 6):
+        for i in range(start, start + 4):
+            edges.append((f'f{i}', f'f{i + 1}', {'weight': i, 'linestring': LineString([(0, 0), (0, i)])}))
+    edges.append(('f1', 'f3', {'weight': 100, 'linestring': LineString([(1, 0), (1, 100)])}))
+
+    for storage in FATGraph.STORAGES:
+        fatg = FATGraph(fats=fats, edges=edges, storage=storage)
+        greedy = fatg.group_by_n(n=2, evaluate_data_key='weight', retrieve_data_key='linestring')
+        bisection = fatg.group_by_bisection(n=2, evaluate_data_key='weight', retrieve_data_key='linestring')
+
+        for groups in (greedy, bisection):
+            grouped = sorted(fat for group in groups for fat in group['fats_in_group'])
+            assert grouped == sorted(fats)  # every FAT exactly once
+            for group in groups:
+                assert len(group['fats_in_group']) <= 2
+                assert len(group['edges_in_group']) == len(group['fats_in_group']) - 1  # spanning trees
+                assert group['weight_in_group'] == sum(line.length for line in group['edges_in_group'])
+
+        # the f1-f3 shortcut is never worth it
+        assert all(group['weight_in_group'] < 100 for group in bisection)
+        print(f"\t{storage}: greedy {sum(g['weight_in_group'] for g in greedy)}, "
+              f"bisection {sum(g['weight_in_group'] for g in bisection)}")
+
+        # the thread groups with its strategy, group_by_n stays greedy
+        fatggt = FATGraphGrouperThread(fat_graph=fatg, n=2, strategy='bisection')
+        assert fatggt.group() == bisection
+        assert fatggt.group_by_n() == greedy
+
+    print(green("_test8 executed successfully"))
+
+def _test9():
+    fatg = FATGraph(
+        fats=['f1', 'f2', 'f3', 'f4'],
+        edges=[
+            ('f1', 'f2', {'weight': 3, 'linestring': LineString([(0, 0), (3, 0)])}),
+            ('f2', 'f3', {'weight': 4, 'linestring': LineString([(3, 0), (3, 4)])}),
+            ('f3', 'f1', {'weight': 9, 'linestring': None}),
+        ],
+        storage='sparse'
+    )
+
+    with TemporaryDirectory() as tmp_dir:
+        file_path = join(tmp_dir, 'fat_graph.fatg')
+        fatg.save(file_path)
+
+        loaded = FATGraph.load(file_path)
+        assert loaded.fats == fatg.fats
+        assert loaded.get_edge_data('f2', 'f1')['weight'] == 3
+        assert loaded.get_edge_data('f3', 'f2')['linestring'].equals(LineString([(3, 0), (3, 4)]))
+        assert loaded.get_edge_data('f1', 'f3')['linestring'] is None
+        assert loaded.get_edge_data('f1', 'f4') is None
+        assert loaded.group_by_n(n=4, evaluate_data_key='weight', retrieve_data_key='weight') == \
+            fatg.group_by_n(n=4, evaluate_data_key='weight', retrieve_data_key='weight')
+
+        try:
+            loaded.insert_edge(('f3', 'f4', {'weight': 1, 'linestring': None}))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("a loaded FATGraph must be read only")
+
+        copied = FATGraph.load(file_path, storage='sparse')
+        copied.insert_edge(('f3', 'f4', {'weight': 1, 'linestring': None}))
+        assert copied.get_edge_data('f4', 'f3')['weight'] == 1
+
+        FATGraph(fats=[]).save(file_path)
+        assert FATGraph.load(file_path).fats == []
+
+    print(green("_test9 executed successfully"))
+
+def _test10():
+    # the heap frontier groups match the full scan groups, ties included
+    for seed in range(20):
+        fats, edges = _random_fat_graph_input(seed)
+        for n in (3, 5, 16):
+            expected = _group_by_n_scan(fats, edges, n)
+            for storage in FATGraph.STORAGES:
+                groups = FATGraph(fats=fats, edges=edges, storage=storage).group_by_n(n, 'weight', 'linestring')
+                assert [(group['fats_in_group'], group['edges_in_group']) for group in groups] == expected
+
+    print(green("_test10 executed successfully"))
+
+def _test11():
+    fats, edges = _random_fat_graph_input(0, n_fats=60, n_edges=50)  # many components
+    fatg = FATGraph(fats=fats, edges=edges, storage='dense')
+
+    components = fatg.get_connected_components()
+    assert sorted(fat_idx for component in components for fat_idx in component) == list(range(len(fats)))
+    assert [component[0] for component in components] == sorted(component[0] for component in components)
+    for component in components:
+        subgraph = fatg.get_subgraph(component)
+        assert subgraph.fats == [fats[fat_idx] for fat_idx in component]
+        assert len(subgraph.get_connected_components()) == 1
+        for sub_idx, fat_idx in enumerate(component):
+            assert [(component[i], data) for i, data in subgraph._adjacency.neighbours(sub_idx)] == \
+                fatg._adjacency.neighbours(fat_idx)
+
+    # grouping every component in a process pool gives the groups of the sequential grouping
+    def key(groups: list) -> list:
+        return sorted((group['fats_in_group'], group['edges_in_group'], group['weight_in_group']) for group in groups)
+
+    for strategy in ('greedy', 'bisection'):
+        sequential = FATGraphGrouperThread(fat_graph=fatg, n=4, strategy=strategy).run()
+        parallel = FATGraphGrouperThread(fat_graph=fatg, n=4, workers=2, strategy=strategy).run()
+        assert key(parallel) == key(sequential)
+
+    print(green("_test11 executed successfully"))
+
+def _test12():
+    fats = ['f1', 'f2', 'f1', 'f3', 'f2']  # f1 and f2 appear twice
+
+    for storage in ('dense', 'sparse'):
+        # a name refers to the index of its first appearance
+        fatg = FATGraph(fats=fats, storage=storage)
+        assert fatg.get_indexes_of_fats(['f1', 'f2', 'f3', 'f9']) == [0, 1, 3, -1]
+        assert fatg._get_index_of_fat('f2') == 1 and fatg.has_fat('f1') and not fatg.has_fat('f9')
+
+        # inserting the edges by name or by the indexes of their names gives the same graph
+        edges = [('f1', 'f3', {'weight': 1}), ('f2', 'f1', {'weight': 2}), ('f3', 'f2', {'weight': 3})]
+        by_name = FATGraph(fats=fats, edges=edges, storage=storage)
+        by_index = FATGraph(fats=fats, storage=storage)
+        by_index.insert_edges(
+            idxs_1=by_index.get_indexes_of_fats([fat_1 for fat_1, _, _ in edges]),
+            idxs_2=by_index.get_indexes_of_fats([fat_2 for _, fat_2, _ in edges]),
+            datas=[data for _, _, data in edges]
+        )
+        for fatg in (by_name, by_index):
+            assert str(fatg) == str(by_name)
+            assert fatg._adjacency.neighbours(0) == [(1, {'weight': 2}), (3, {'weight': 1})]
+            assert fatg._adjacency.neighbours(2) == [] and fatg._adjacency.neighbours(4) == []
+
+        # edges of the later appearances are out of reach by name
+        by_index.insert_edges(idxs_1=[2], idxs_2=[4], datas=[{'weight': 4}])
+        assert by_index.get_edge_data('f1', 'f2') == {'weight': 2}
+
+        # the rule holds after a save and load
+        with TemporaryDirectory() as tmp_dir:
+            file_path = join(tmp_dir, 'fat_graph.fatg')
+            by_name.save(file_path)
+            loaded = FATGraph.load(file_path)
+            assert loaded.get_indexes_of_fats(['f1', 'f2', 'f3']) == [0, 1, 3]
+            assert loaded.get_edge_data('f3', 'f1')['weight'] == 1
+
+    print(green("_test12 executed successfully"))
+
 def _tests():
     _test5()
 
@@ -0,0 +1,53 @@
+import gc
+import json
+
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from src.logger import Logger, DEBUG, INFO, WARNING, DISABLED, _SINKS
+from src.clic import red, green, orange
+
+
+def _test1():
+    with TemporaryDirectory() as tmp_dir:
+        file_path = join(tmp_dir, 'log.txt')
+        l = Logger(log_type='file', level=INFO, file_path=file_path, buffer_size=2)
+
+        formatted = []
+        l.log(lambda: formatted.append(1) or 'not written', level=DEBUG)  # below the level, never formatted
+        assert formatted == []
+
+        l.log("walker %s at %s", 'w1', (0, 1))
+        l.warning("dead end")
+        l.info(lambda: 'callable')
+        l.flush()
+        with open(file_path) as log_file:
+            assert log_file.read().splitlines() == ["walker w1 at (0, 1)", "dead end", "callable"]
+
+        json_path = join(tmp_dir, 'log.json')
+        l = Logger(log_type='json', level=DEBUG, file_path=json_path)
+        l.debug("group %s", ['f1', 'f2'])
+        l.flush()
+        with open(json_path) as log_file:
+            record = json.loads(log_file.readline())
+        assert record['level'] == 'DEBUG' and record['message'] == "group ['f1', 'f2']"
+
+        # a collected logger writes its buffer and is not kept alive until exit
+        l.info("last")
+        del l
+        gc.collect()
+        assert len(_SINKS) == 0
+        with open(json_path) as log_file:
+            assert json.loads(log_file.read().splitlines()[-1])['message'] == "last"
+
+    assert Logger(level=DISABLED).level > WARNING
+
+    print(green("_test1 executed successfully"))
+
+def _tests():
+    _test1()
+
+
+if __name__ == "__main__":
+    print(orange("logger_tests.py executed directly\n"))
+    _tests()
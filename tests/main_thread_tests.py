@@ -9,11 +9,14 @@ from shapely.ops import (
 )
 from shapely import unary_union, intersection
 
+from os import listdir
 from os.path import join
+from tempfile import TemporaryDirectory
 
 from src.env import SHP_PATH
 from src.path_finder2 import _SegmentWalker, _Walk, path_finder
 from src.main_thread import MainThread
+from src.fat_graph import FATGraph
 from src.clic import red, green, orange
 
 
@@ -24,8 +27,29 @@ def _test1():
     print(green("_test1 executed successfully"))
 
 
+def _test2():
+    edges = [('f1', 'f2', {'weight': 3}), ('f2', 'f3', {'weight': 4})]
+    with TemporaryDirectory() as tmp_dir:
+        for name in ('fat_graph_0000000000000000.fatg', 'fat_graph_1111111111111111.fatg', 'all_paths.gpkg'):
+            open(join(tmp_dir, name), 'wb').close()
+
+        # the graphs cached for other fingerprints are removed
+        file_path = join(tmp_dir, 'fat_graph_2222222222222222.fatg')
+        MainThread._save_fat_graph(FATGraph(fats=['f1', 'f2', 'f3'], edges=edges), file_path)
+        assert sorted(listdir(tmp_dir)) == ['all_paths.gpkg', 'fat_graph_2222222222222222.fatg']
+        assert FATGraph.load(file_path).get_edge_data('f3', 'f2')['weight'] == 4
+
+        # FATs named by floats can't be saved, the graph is not cached
+        file_path = join(tmp_dir, 'fat_graph_3333333333333333.fatg')
+        MainThread._save_fat_graph(FATGraph(fats=[1.5, 2.5], edges=[(1.5, 2.5, {'weight': 1})]), file_path)
+        assert sorted(listdir(tmp_dir)) == ['all_paths.gpkg']
+
+    print(green("_test2 executed successfully"))
+
+
 def _tests():
     _test1()
+    _test2()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,64 @@
+import geopandas as gpd
+from shapely.ops import (
+    Point,
+    LineString
+)
+
+from src.parallel_path_finder_thread import ParallelPathFinderThread
+from src.path_finder_thread import PathFinderThread
+from src.clic import red, green, orange
+
+
+def _test1():
+    # 6 x 6 grid of strands
+    lines = []
+    for i in range(6):
+        for j in range(6):
+            if i + 1 < 6:
+                lines.append(LineString([(i, j), (i + 1, j)]))
+            if j + 1 < 6:
+                lines.append(LineString([(i, j), (i, j + 1)]))
+    fats_gdf = gpd.GeoDataFrame(
+        {'Numero_NAP': ['f0', 'f1', 'f2', 'f3', 'f4']},
+        geometry=[Point(0, 0), Point(5, 5), Point(2, 3), Point(5, 0), Point(1, 4)],
+        crs=4326
+    )
+
+    sequential = [
+        PathFinderThread(
+            source_fat_gdf=fats_gdf,
+            source_fat_id_col='Numero_NAP',
+            source_fat_idx=i,
+            path=lines,
+            tolerance=0.01
+        ).run() for i in range(5)
+    ]
+
+    # results come back in the order of fat_idxs, the missing FAT 99 fails
+    fat_idxs = [4, 99, 0, 3, 2, 1]
+    ppft = ParallelPathFinderThread(
+        fats_gdf=fats_gdf,
+        fats_id_col='Numero_NAP',
+        path=lines,
+        tolerance=0.01,
+        workers=3
+    )
+    results = list(ppft.run(fat_idxs))
+
+    assert [i for i, _ in results] == fat_idxs
+    for i, paths in results:
+        if i == 99:
+            assert paths is None
+        else:
+            assert [p.wkt for p in paths] == [p.wkt for p in sequential[i]]
+
+    print(green("_test1 executed successfully"))
+
+
+def _tests():
+    _test1()
+
+
+if __name__ == '__main__':
+    print(orange("parallel_path_finder_thread_tests.py executed directly\n"))
+    _tests()
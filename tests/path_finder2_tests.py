@@ -5,6 +5,7 @@ from shapely.ops import (
     LineString,
     MultiLineString,
     GeometryCollection,
+    Polygon,
     nearest_points
 )
 from shapely import unary_union, intersection
@@ -12,7 +13,7 @@ from shapely import unary_union, intersection
 from os.path import join
 
 from src.env import SHP_PATH
-from src.path_finder2 import _SegmentWalker, _Walk, path_finder
+from src.path_finder2 import _SegmentWalker, _Walk, _StrandTopology, path_finder, all_paths_finder
 from src.clic import red, green, orange
 
 
@@ -81,6 +82,92 @@ def _test1():
     print(green("_test1 executed successfully"))
 
 
+def _test2():
+    meter = 0.00001
+    lines = [
+        LineString([(0, 0), (10 * meter, 0)]),
+        LineString([(10 * meter, 0.1 * meter), (20 * meter, 0)]),  # start snapped to (10 m, 0)
+        LineString([(10 * meter, 0), (10 * meter, 10 * meter)]),
+        LineString([(30 * meter, 0), (40 * meter, 0)]),  # disconnected
+    ]
+
+    topology = _StrandTopology(lines=lines, tolerance=meter * 0.5)
+    assert topology.get_node_count() == 6
+    assert topology.get_strand_count() == 4
+
+    junction = topology.find_node(10 * meter, 0)
+    assert junction is not None
+    assert sorted(s_id for s_id, _, _ in topology.get_incident_strands(junction)) == [0, 1, 2]
+    assert topology.find_node(25 * meter, 0) is None
+
+    paths_found = path_finder(
+        source=Point(0, 0),
+        path=lines,
+        targets=[Point(20 * meter, 0), Point(40 * meter, 0)],
+        tolerance=meter * 0.5
+    )
+    assert len(paths_found) == 1
+    assert Point(paths_found[0].coords[-1]).equals(Point(20 * meter, 0))
+
+    print(green("_test2 executed successfully"))
+
+
+def _test3():
+    lines = [
+        LineString([(0, 0), (1, 0)]),
+        LineString([(1, 0), (2, 0)]),
+        LineString([(2, 0), (3, 0)]),
+        LineString([(1, 0), (1, 5), (2, 5), (2, 0)]),  # longer detour
+        LineString([(3, 0), (3, 1)]),
+    ]
+    fats = [Point(0, 0), Point(2, 0), Point(3, 1)]
+
+    paths_found = all_paths_finder(sources=fats, path=lines, tolerance=0.01)
+    ends = sorted((p.coords[0], p.coords[-1]) for p in paths_found)
+    assert ends == [
+        ((0, 0), (2, 0)),
+        ((2, 0), (0, 0)),
+        ((2, 0), (3, 1)),
+        ((3, 1), (2, 0)),
+    ]
+    for p in paths_found:
+        assert p.length <= 2 + 1e-9  # detour never taken
+
+    walk_paths = path_finder(source=fats[0], path=lines, targets=fats[1:], tolerance=0.01)
+    assert [p.coords[-1] for p in walk_paths] == [(2, 0), (2, 0)]
+
+    w = _Walk(source=fats[1], path=lines, targets=[fats[0], fats[2]], tolerance=0.01, target_ids=['f1', 'f3'])
+    walk_paths = w.walk()
+    assert sorted(w.get_found_target_ids()) == ['f1', 'f3']
+
+    print(green("_test3 executed successfully"))
+
+
+def _test4():
+    lines = [
+        LineString([(0, 0), (1, 0)]),
+        LineString([(1, 0), (2, 0)]),
+        LineString([(2, 0), (3, 0)]),
+        LineString([(1, 0), (1, 5), (2, 5)]),  # longer detour
+        LineString([(2, 5), (2, 0)]),
+    ]
+    fats = [Point(0, 0), Point(3, 0)]
+
+    # a blocked duct in the short way, the detour is taken
+    paths_found = all_paths_finder(sources=fats, path=lines, tolerance=0.01, obstacles=[Point(1.5, 0)])
+    assert len(paths_found) == 2 and all((2, 5) in p.coords for p in paths_found)
+
+    # a no-go area over both ways
+    no_go = Polygon([(0.5, -1), (0.8, -1), (0.8, 1), (0.5, 1)])
+    assert all_paths_finder(sources=fats, path=lines, tolerance=0.01, obstacles=[no_go]) == []
+    assert path_finder(source=fats[0], path=lines, targets=fats[1:], tolerance=0.01, obstacles=[no_go]) == []
+
+    paths_found = path_finder(source=fats[0], path=lines, targets=fats[1:], tolerance=0.01, obstacles=[Point(1.5, 0)])
+    assert len(paths_found) == 1 and paths_found[0].coords[-1] == (3, 0)
+
+    print(green("_test4 executed successfully"))
+
+
 def _tests():
     _test1()
 
@@ -1,3 +1,4 @@
+import numpy as np
 import geopandas as gpd
 from shapely.ops import (
     Point,
@@ -5,6 +6,7 @@ from shapely.ops import (
     LineString,
     MultiLineString,
     GeometryCollection,
+    Polygon,
     nearest_points
 )
 from shapely import unary_union, intersection
@@ -12,10 +14,57 @@ from shapely import unary_union, intersection
 from os.path import join
 
 from src.env import SHP_PATH
-from src.path_finder import _Walker, path_finder
+from src.path_finder import _Walker, _PathIndex, path_finder
+from src.simplify import remove_redundant_points
 from src.clic import red, green, orange
 
 
+class _DifferenceWalker(_Walker):
+    """_Walker removing the walked sections with path.difference(circle), as before _PathIndex"""
+
+    def _find_next_steps(self) -> list:
+        circle = self.current_pos.buffer(self.step_size)
+        inter = circle.boundary.intersection(self.path)
+        points = inter.geoms if isinstance(inter, (MultiPoint, GeometryCollection)) else [inter]
+        next_steps = self._sort_next_steps([p for p in points if isinstance(p, Point) and not self._matches_previous(p)])
+        path = self.path.difference(circle) if next_steps != [] else self.path
+        return [
+            _DifferenceWalker(
+                previous=self,
+                current_pos=ns,
+                target=self.target,
+                path=path,
+                step_size=self.step_size,
+                reach_dist=self.reach_dist,
+                max_walking_distance=self.max_walking_distance - self.step_size,
+                path_index=self.path_index
+            ) for ns in next_steps
+        ]
+
+    def _walk(self) -> list:
+        if self._base_case_path_found():
+            return [True, [self.current_pos], self.path]
+        if self._base_case_max_distance_walked():
+            return [False, [], self.path]
+        self.next = self._find_next_steps()
+        if self._base_case_dead_end():
+            return [False, [], self.path]
+
+        path = None
+        for w in self.next:
+            if path is not None:
+                w.path = path
+            [tf, pos_list, path] = w._walk()
+            if tf:
+                return [True, [self.current_pos] + pos_list, self.path]
+        return [False, [], path]
+
+    def walk(self) -> LineString:
+        [tf, pos_list, _] = self._walk()
+        return remove_redundant_points(pos_list + [self.target]) if tf else None
+
+
+
 def _test1():
     lines = [
         LineString([(0, 0), (20, 0)]),
@@ -148,6 +197,126 @@ def _test3():
     print(green("_test3 executed successfully"))
 
 
+def _test4():
+    lines = [
+        LineString([(0, 0), (20, 0)]),
+        LineString([(10, -10), (10, 20)]),
+        LineString([(20, 10), (0, 10)]),
+        LineString([(5, -10), (5, 20)]),
+    ]
+    path = unary_union(lines)
+
+    walk = path_finder(Point(2, 0), Point(0, 10), path, step_size=0.153, engine='analytic')
+    assert walk.equals(LineString([(2, 0), (5, 0), (5, 10), (0, 10)]))
+
+    # (5, 5) blocks the shortest way, the walk goes around through x = 10
+    walk = path_finder(Point(2, 0), Point(0, 10), path, obstacles=[Point(5, 5)], step_size=0.153, engine='analytic')
+    assert walk.equals(LineString([(2, 0), (10, 0), (10, 10), (0, 10)]))
+
+    assert path_finder(Point(2, 0), Point(0, 10), path, step_size=0.153, max_walking_distance=15, engine='analytic') is None
+
+    # an off-network source joins the strands at its projection
+    walk = path_finder(Point(17.84, 5), Point(0, 10), path, step_size=0.153, engine='analytic')
+    assert walk.coords[0] == (17.84, 5) and walk.coords[1] == (17.84, 0)
+    walk = path_finder(Point(3, 1), Point(0, 10), path, step_size=0.153, engine='analytic')
+    assert walk.equals(LineString([(3, 1), (3, 0), (5, 0), (5, 10), (0, 10)]))
+
+    # a no-go area over x = 5 and x = 10, both engines give up
+    no_go = Polygon([(4, 2), (11, 2), (11, 3), (4, 3)])
+    for engine in ('walker', 'analytic'):
+        assert path_finder(Point(2, 0), Point(0, 10), path, obstacles=[no_go], step_size=0.153, engine=engine) is None
+
+    # long walks don't recurse
+    chain = MultiLineString([LineString([(i, 0), (i + 1, 0)]) for i in range(5000)])
+    walk = path_finder(Point(0, 0), Point(5000, 0), chain, step_size=0.1, max_walking_distance=10000, engine='analytic')
+    assert walk.length == 5000
+
+    print(green("_test4 executed successfully"))
+
+
+def _test5():
+    path_index = _PathIndex(MultiLineString([LineString([(0, 0), (10, 0)])]), tolerance=0.01)
+    path_index.visit(0, 2, 4)
+    path_index.visit(0, 6, 8)
+    path_index.visit(0, 3, 6.5)
+    assert path_index.is_visited(0, 5) and path_index.is_visited(0, 7.9)
+    assert not path_index.is_visited(0, 1) and not path_index.is_visited(0, 2)  # interval ends are walkable
+    assert path_index.query(Point(5, 1), 0.5) == [] and path_index.query(Point(5, 1), 1) == [0]
+
+    # the Walkers share the path (no copies)
+    lines = [LineString([(0, y), (40, y)]) for y in range(0, 50, 10)] + [LineString([(x, 0), (x, 40)]) for x in range(0, 50, 10)]
+    w = _Walker(
+        current_pos=Point(0, 0),
+        target=Point(20, 20),
+        path=unary_union(lines),
+        step_size=1,
+        reach_dist=1,
+        max_walking_distance=100
+    )
+    walk = w.walk()
+    assert walk is not None and walk.coords[-1] == (20, 20)
+    assert all(child.path is w.path for child in w.next)
+
+    # obstacles are checked once, at the source, the strands are cut around them
+    path_index = _PathIndex(unary_union(lines), tolerance=0.01, obstacles=[Point(10, 5)], clearance=1)
+    checks = []
+    is_blocked = path_index.is_blocked
+    path_index.is_blocked = lambda point, distance: checks.append(point) or is_blocked(point, distance)
+    w = _Walker(
+        current_pos=Point(0, 0),
+        target=Point(20, 20),
+        obstacles=[Point(10, 5)],
+        path=unary_union(lines),
+        step_size=1,
+        reach_dist=1,
+        max_walking_distance=100,
+        path_index=path_index
+    )
+    walk = w.walk()
+    assert walk is not None and walk.coords[-1] == (20, 20)
+    assert walk.distance(Point(10, 5)) >= 1
+    assert checks == [Point(0, 0)]
+
+    print(green("_test5 executed successfully"))
+
+
+def _test6():
+    # junctions swept by the circle are walked: the walker on (3.3, 0) does not step back to (4, 0)
+    path = unary_union([LineString([(0, 0), (4, 0)]), LineString([(4, 0), (8, 0)]), LineString([(4, 0), (4, 4)])])
+    w = _Walker(current_pos=Point(4, 0.02), target=Point(0, 4), path=path, step_size=0.7, reach_dist=0.7)
+    for child in w._find_next_steps():
+        assert all(next_step.current_pos.distance(Point(4, 0)) > 0.01 for next_step in child._find_next_steps())
+
+    # same walks as the difference based _Walker, on a grid with junctions of 3 and 4 strands
+    rng = np.random.default_rng(0)
+    nodes = np.array([[(4 * i, 4 * j) for j in range(5)] for i in range(5)], dtype=float) + rng.uniform(-0.6, 0.6, size=(5, 5, 2))
+    lines = []
+    for i in range(5):
+        for j in range(5):
+            if i + 1 < 5:
+                lines.append(LineString([nodes[i, j], nodes[i + 1, j]]))
+            if j + 1 < 5:
+                lines.append(LineString([nodes[i, j], nodes[i, j + 1]]))
+    path = unary_union(lines)
+
+    for _ in range(20):
+        (i1, j1), (i2, j2) = rng.integers(0, 5, size=(2, 2))
+        source, target = Point(nodes[i1, j1]), Point(nodes[i2, j2])
+        walk = path_finder(source, target, path, step_size=0.7, max_walking_distance=60)
+        expected = _DifferenceWalker(
+            current_pos=source,
+            target=target,
+            path=path,
+            step_size=0.7,
+            reach_dist=0.7,
+            max_walking_distance=60
+        ).walk()
+        assert (walk is None) == (expected is None)
+        assert walk is None or walk.hausdorff_distance(expected) < 1e-6
+
+    print(green("_test6 executed successfully"))
+
+
 def _tests():
     _test3()
 
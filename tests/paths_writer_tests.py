@@ -0,0 +1,80 @@
+import geopandas as gpd
+from shapely.ops import (
+    Point,
+    LineString
+)
+
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from src.paths_writer import PathsWriter
+from src.main_thread import MainThread
+from src.clic import red, green, orange
+
+
+def _test1():
+    with TemporaryDirectory() as tmp_dir:
+        file_path = join(tmp_dir, 'all_paths.gpkg')
+
+        pw = PathsWriter(file_path=file_path)
+        pw.append('f1', Point(0, 0), [LineString([(0, 0), (1, 0)]), LineString([(0, 0), (0, 1)])])
+        pw.append('f2', Point(1, 0), [])  # done without paths
+
+        # f3 is interrupted after writing part of its paths, before being marked done
+        partial_gdf = gpd.GeoDataFrame(
+            {PathsWriter.SOURCE_COL: ['f3']},
+            geometry=[LineString([(2, 0), (3, 0)])],
+            crs=4326
+        )
+        partial_gdf.to_file(file_path, layer=PathsWriter.PATHS_LAYER, driver='GPKG', mode='a')
+
+        # resuming skips the finished FATs and drops the partial paths of f3
+        pw = PathsWriter(file_path=file_path, resume=True)
+        assert pw.get_done_fats() == {'f1', 'f2'}
+        assert sorted(pw.read()[PathsWriter.SOURCE_COL]) == ['f1', 'f1']
+
+        pw.append('f3', Point(2, 0), [LineString([(2, 0), (3, 0)]), LineString([(2, 0), (2, 1)])])
+        assert sorted(pw.read()[PathsWriter.SOURCE_COL]) == ['f1', 'f1', 'f3', 'f3']
+
+        # not resuming starts from scratch
+        pw = PathsWriter(file_path=file_path)
+        assert pw.get_done_fats() == set()
+        try:
+            pw.read()
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("reading a missing GeoPackage must raise FileNotFoundError")
+
+    print(green("_test1 executed successfully"))
+
+def _test2():
+    with TemporaryDirectory() as tmp_dir:
+        legacy_file_path = join(tmp_dir, 'all_paths.shp')
+        pw = PathsWriter(file_path=join(tmp_dir, 'all_paths.gpkg'), resume=True)
+
+        try:
+            MainThread._read_all_paths(pw, legacy_file_path)
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("reading without GeoPackage nor shapefile must raise FileNotFoundError")
+
+        # only the legacy shapefile
+        gpd.GeoDataFrame(geometry=[LineString([(0, 0), (1, 0)])], crs=4326).to_file(legacy_file_path)
+        assert len(MainThread._read_all_paths(pw, legacy_file_path)) == 1
+
+        # the GeoPackage comes first
+        pw.append('f1', Point(0, 0), [LineString([(0, 0), (1, 0)]), LineString([(0, 0), (0, 1)])])
+        assert len(MainThread._read_all_paths(pw, legacy_file_path)) == 2
+
+    print(green("_test2 executed successfully"))
+
+def _tests():
+    _test1()
+    _test2()
+
+
+if __name__ == '__main__':
+    print(orange("paths_writer_tests.py executed directly\n"))
+    _tests()
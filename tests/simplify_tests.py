@@ -0,0 +1,77 @@
+import numpy as np
+from shapely.ops import (
+    Point,
+    LineString
+)
+
+from src.simplify import remove_redundant_points
+from src.clic import red, green, orange
+
+
+def _remove_redundant_points_loop(points: list[Point], normalized: bool) -> list[Point]:
+    """Point by point removal the vectorized one replaced (path_finder exact, path_finder2 normalized)"""
+
+    redundant_idx = []
+    for p_idx in range(1, len(points) - 1):
+        p_prev, p_curr, p_next = points[p_idx - 1], points[p_idx], points[p_idx + 1]
+
+        v1 = (p_curr.x - p_prev.x, p_curr.y - p_prev.y)  # p_prev to p_curr
+        v2 = (p_next.x - p_curr.x, p_next.y - p_curr.y)  # p_curr to p_next
+        v2_90 = (v2[1], -1 * v2[0])  # v2 rotated 90 degrees
+
+        if normalized:
+            m1 = ((v1[0] ** 2) + (v1[1] ** 2)) ** 0.5
+            m2 = ((v2[0] ** 2) + (v2[1] ** 2)) ** 0.5
+            scalar_prod = (v1[0] / m1) * (v2_90[0] / m2) + (v1[1] / m1) * (v2_90[1] / m2)
+            if abs(scalar_prod) < 0.01:
+                redundant_idx.append(p_idx)
+        elif v1[0] * v2_90[0] + v1[1] * v2_90[1] == 0:
+            redundant_idx.append(p_idx)
+
+    return [p for p_idx, p in enumerate(points) if p_idx not in redundant_idx]
+
+
+def _test1():
+    points = [Point(0, 0), Point(1, 0), Point(2, 0), Point(2, 1), Point(2, 3), Point(3, 4)]
+    assert remove_redundant_points(points).equals(LineString([(0, 0), (2, 0), (2, 3), (3, 4)]))
+    assert list(remove_redundant_points(np.array([(0, 0), (1, 1)])).coords) == [(0, 0), (1, 1)]
+
+    # same points removed as the point by point loop, on staircase paths with collinear runs
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        steps = rng.integers(0, 3, size=(40, 2)) * rng.choice([-1, 1], size=(40, 1))
+        coords = np.cumsum(np.vstack([(0, 0), steps]), axis=0).astype(float)
+        coords = coords[np.any(np.diff(coords, axis=0, prepend=[[np.nan, np.nan]]) != 0, axis=1)]  # no zero length segments
+        points = [Point(xy) for xy in coords]
+
+        assert list(remove_redundant_points(points).coords) == \
+            [(p.x, p.y) for p in _remove_redundant_points_loop(points, normalized=False)]
+
+        noisy = coords + rng.normal(scale=0.001, size=coords.shape)
+        noisy_points = [Point(xy) for xy in noisy]
+        assert list(remove_redundant_points(noisy, tolerance=0.01, normalized=True).coords) == \
+            [(p.x, p.y) for p in _remove_redundant_points_loop(noisy_points, normalized=True)]
+
+    print(green("_test1 executed successfully"))
+
+
+def _test2():
+    # tolerance is a strict bound, exactly aligned points are redundant with any tolerance
+    points = [Point(0, 0), Point(1, 0), Point(4, 4)]  # cross product 4, sine 4 / 5
+    assert len(remove_redundant_points(points, tolerance=4).coords) == 3
+    assert len(remove_redundant_points(points, tolerance=4.001).coords) == 2
+    assert len(remove_redundant_points(points, tolerance=0.8, normalized=True).coords) == 3
+    assert len(remove_redundant_points(points, tolerance=0.801, normalized=True).coords) == 2
+    assert len(remove_redundant_points([Point(0, 0), Point(1, 1), Point(3, 3)]).coords) == 2
+
+    print(green("_test2 executed successfully"))
+
+
+def _tests():
+    _test1()
+    _test2()
+
+
+if __name__ == '__main__':
+    print(orange("simplify_tests.py executed directly\n"))
+    _tests()
@@ -0,0 +1,47 @@
+import numpy as np
+import geopandas as gpd
+from shapely.ops import (
+    Point,
+    LineString,
+    nearest_points
+)
+from shapely import unary_union
+
+from src.snapping import get_line_ends, snap_to_line_ends
+from src.clic import red, green, orange
+
+
+def _test1():
+    lines = [
+        LineString([(0, 0), (5, 0)]),
+        LineString([(5, 0), (5, 5), (9, 5)]),
+        LineString([(0, 0), (0, 7)]),
+        LineString([(9, 5), (12, 1)])
+    ]
+    assert [(p.x, p.y) for p in get_line_ends(lines)] == [(0, 0), (5, 0), (9, 5), (0, 7), (12, 1)]
+
+    rng = np.random.default_rng(0)
+    fats_gdf = gpd.GeoDataFrame(
+        {'Numero_NAP': [f'f{i}' for i in range(30)]},
+        geometry=[Point(xy) for xy in rng.uniform(-1, 13, size=(30, 2))],
+        crs=4326
+    )
+
+    # same snapped points as the point by point nearest_points snapping
+    path_ends = unary_union([Point(line.coords[0]) for line in lines] + [Point(line.coords[-1]) for line in lines])
+    expected = [nearest_points(path_ends, fat)[0] for fat in fats_gdf.geometry]
+
+    fats_gdf['geometry'] = snap_to_line_ends(fats_gdf.geometry.values, lines)
+    assert fats_gdf.crs == 4326 and fats_gdf.geometry.crs == 4326
+    assert all(snapped.equals(point) for snapped, point in zip(fats_gdf.geometry, expected))
+
+    print(green("_test1 executed successfully"))
+
+
+def _tests():
+    _test1()
+
+
+if __name__ == '__main__':
+    print(orange("snapping_tests.py executed directly\n"))
+    _tests()